@@ -1,15 +1,54 @@
+import argparse
+import collections
+import contextlib
+import copy
+import cProfile
+import heapq
+import json
+import os
+import pstats
 import pygame
 import sys
 import random
 import math
+import time
+
+try:
+    import numpy as np
+except ImportError:    # Optional: only the vectorized backend needs NumPy
+    np = None
+
+
+def parse_args():
+    """Command line options"""
+    parser = argparse.ArgumentParser(description="Coral Reef Aquarium")
+    parser.add_argument("--headless", action="store_true",
+                        help="run the simulation without drawing and report ticks/sec")
+    parser.add_argument("--ticks", type=int, default=3600,
+                        help="number of simulation ticks to run in headless mode (default: 3600)")
+    parser.add_argument("--scenario", metavar="FILE",
+                        help="load the starting tank from a JSON scenario file")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="seed the random streams so a run can be reproduced exactly")
+    parser.add_argument("--fps", type=int, default=FPS,
+                        help=f"render rate in frames per second; the simulation always runs at {SIM_HZ} Hz (default: {FPS})")
+    parser.add_argument("--numpy", action="store_true",
+                        help="update feeder fish as NumPy arrays (for tanks with thousands of feeders)")
+    parser.add_argument("--schooling", action="store_true",
+                        help="feeder fish swim in schools and scatter from predators")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="record a Chrome trace (Perfetto / chrome://tracing) of the first frames to FILE")
+    parser.add_argument("--trace-frames", type=int, default=600,
+                        help="number of frames (ticks when headless) to trace (default: 600)")
+    parser.add_argument("--cprofile", metavar="FILE",
+                        help="run cProfile over the first frames, save FILE (.pstats) and print the top functions")
+    parser.add_argument("--cprofile-frames", type=int, default=300,
+                        help="number of frames (ticks when headless) to profile, also used by the C key (default: 300)")
+    return parser.parse_args()
 
-# Initialize Pygame
-pygame.init()
 
 # Screen dimensions
 WIDTH, HEIGHT = 1200, 800
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Coral Reef Aquarium")
 
 # Colors
 OCEAN_BLUE = (20, 105, 140)
@@ -23,11 +62,9 @@ GREEN = (50, 255, 50)
 YELLOW = (255, 255, 50)
 
 # Fish rendering style: 0=Realistic, 1=Cartoon, 2=Pixel, 3=Tropical, 4=Army, 5=Air Force, 6=Space Force, 7=Navy
-fish_style = 0
 fish_style_names = ["Realistic", "Cartoon", "Pixel Art", "Tropical", "US Army", "Air Force", "Space Force", "Navy"]
 
 # Background scene: 0=None, 1=Whale, 2=Tank, 3=Fighter Jet, 4=Battleship, 5=Space Shuttle
-background_scene = 0
 background_scene_names = ["None", "Whale Migration", "Tank Assault", "Air Strike", "Naval Barrage", "Space Launch"]
 
 # Distance scale factor for background (appears 2x farther away)
@@ -35,13 +72,21 @@ BG_SCALE = 0.5
 # Fixed Y level: halfway between top of screen (0) and top of ship hull (450)
 BG_Y = 225
 
-# UI visibility toggle
-ui_visible = True
+# Simulation runs at a fixed rate; every per-tick constant assumes 60 ticks/sec
+SIM_HZ = 60
+SIM_DT = 1.0 / SIM_HZ
+# Update rates (Hz) for subsystems that change too slowly to need every tick
+SUBSYSTEM_RATES = {"chemistry": 1, "coral": 5, "algae": 10, "shoals": 2}
+# Default render rate (frames per second), independent of the simulation rate
+FPS = 60
+# Longest stretch of real time simulated in one frame, so a stall doesn't snowball
+MAX_FRAME_TIME = 0.25
 
 
 class BackgroundWhale:
     """Majestic whale crossing in the distance"""
-    def __init__(self):
+    def __init__(self, tank_width=WIDTH):
+        self.tank_width = tank_width
         self.x = -300
         self.y = BG_Y
         self.speed = 0.8 * BG_SCALE
@@ -53,13 +98,13 @@ class BackgroundWhale:
         
     def update(self):
         self.x += self.speed
-        if self.x > WIDTH + 400:
+        if self.x > self.tank_width + 400:
             self.x = -400
         
         self.tail_angle += self.tail_speed
         self.body_wave += 0.02
         
-    def draw(self, screen):
+    def draw(self, screen, rng=random):
         # Whale colors (solid, no transparency)
         whale_color = (60, 80, 100)
         whale_light = (80, 100, 120)
@@ -151,14 +196,16 @@ class BackgroundWhale:
             spout_x = head_x + 10 * BG_SCALE
             spout_y = head_y - 50 * BG_SCALE
             for i in range(5):
-                spray_x = spout_x + random.randint(-10, 10) * BG_SCALE
-                spray_y = spout_y - i * 15 * BG_SCALE - random.randint(0, 20) * BG_SCALE
+                spray_x = spout_x + rng.randint(-10, 10) * BG_SCALE
+                spray_y = spout_y - i * 15 * BG_SCALE - rng.randint(0, 20) * BG_SCALE
                 pygame.draw.circle(screen, (200, 220, 240), (int(spray_x), int(spray_y)), int((5 - i) * BG_SCALE))
 
 
 class BackgroundTank:
     """Tank rolling across with realistic track movement"""
-    def __init__(self):
+    def __init__(self, rng=random, tank_width=WIDTH):
+        self.rng = rng    # Random stream for scene effects
+        self.tank_width = tank_width
         self.x = -200
         self.y = BG_Y
         self.speed = 1.2 * BG_SCALE
@@ -170,7 +217,7 @@ class BackgroundTank:
         self.shell_x = 0
         self.shell_y = 0
         self.shell_active = False
-        self.wall_x = WIDTH * 0.7
+        self.wall_x = tank_width * 0.7
         self.wall_health = 100
         self.explosion_particles = []
         
@@ -196,10 +243,10 @@ class BackgroundTank:
                     self.explosion_particles.append({
                         'x': self.wall_x,
                         'y': self.shell_y,
-                        'vx': random.uniform(-3, 3),
-                        'vy': random.uniform(-4, 2),
-                        'life': random.randint(20, 40),
-                        'size': random.randint(3, 8)
+                        'vx': self.rng.uniform(-3, 3),
+                        'vy': self.rng.uniform(-4, 2),
+                        'life': self.rng.randint(20, 40),
+                        'size': self.rng.randint(3, 8)
                     })
         
         # Update explosions
@@ -215,12 +262,12 @@ class BackgroundTank:
             self.muzzle_flash -= 1
         
         # Reset when off screen
-        if self.x > WIDTH + 300:
+        if self.x > self.tank_width + 300:
             self.x = -250
             self.wall_health = 100
             self.explosion_particles = []
         
-    def draw(self, screen):
+    def draw(self, screen, rng=random):
         # Tank colors (solid)
         tank_green = (70, 85, 60)
         tank_dark = (45, 55, 40)
@@ -305,7 +352,7 @@ class BackgroundTank:
         
         # Explosions
         for p in self.explosion_particles:
-            exp_color = (255, random.randint(100, 200), 50)
+            exp_color = (255, rng.randint(100, 200), 50)
             pygame.draw.circle(screen, exp_color, (int(p['x']), int(p['y'])), int(p['size'] * BG_SCALE))
         
         # Dust trail
@@ -318,7 +365,9 @@ class BackgroundTank:
 
 class BackgroundJet:
     """Fighter jet with missiles and afterburners"""
-    def __init__(self):
+    def __init__(self, rng=random, tank_width=WIDTH):
+        self.rng = rng    # Random stream for scene effects
+        self.tank_width = tank_width
         self.x = -150
         self.y = BG_Y
         self.speed = 4 * BG_SCALE
@@ -326,7 +375,7 @@ class BackgroundJet:
         self.afterburner = True
         self.afterburner_flicker = 0
         self.missiles = []
-        self.wall_x = WIDTH * 0.65
+        self.wall_x = tank_width * 0.65
         self.wall_health = 100
         self.explosions = []
         self.fired = False
@@ -336,7 +385,7 @@ class BackgroundJet:
         self.afterburner_flicker += 0.3
         
         # Fire missiles at wall
-        if self.x > WIDTH * 0.2 and not self.fired and self.wall_health > 0:
+        if self.x > self.tank_width * 0.2 and not self.fired and self.wall_health > 0:
             for i in range(2):
                 self.missiles.append({
                     'x': self.x + self.length * 0.3,
@@ -361,10 +410,10 @@ class BackgroundJet:
                     self.explosions.append({
                         'x': self.wall_x,
                         'y': m['y'],
-                        'vx': random.uniform(-5, 5),
-                        'vy': random.uniform(-6, 4),
-                        'life': random.randint(25, 50),
-                        'size': random.randint(4, 12)
+                        'vx': self.rng.uniform(-5, 5),
+                        'vy': self.rng.uniform(-6, 4),
+                        'life': self.rng.randint(25, 50),
+                        'size': self.rng.randint(4, 12)
                     })
         
         # Update explosions
@@ -377,14 +426,14 @@ class BackgroundJet:
                 self.explosions.remove(e)
         
         # Reset
-        if self.x > WIDTH + 200:
+        if self.x > self.tank_width + 200:
             self.x = -200
             self.wall_health = 100
             self.fired = False
             self.missiles = []
             self.explosions = []
         
-    def draw(self, screen):
+    def draw(self, screen, rng=random):
         jet_gray = (150, 155, 165)
         jet_dark = (80, 85, 95)
         
@@ -461,20 +510,22 @@ class BackgroundJet:
         
         # Explosions
         for e in self.explosions:
-            e_color = (255, random.randint(80, 180), 30)
+            e_color = (255, rng.randint(80, 180), 30)
             pygame.draw.circle(screen, e_color, (int(e['x']), int(e['y'])), int(e['size'] * BG_SCALE))
 
 
 class BackgroundBattleship:
     """Naval battleship launching torpedoes"""
-    def __init__(self):
+    def __init__(self, rng=random, tank_width=WIDTH):
+        self.rng = rng    # Random stream for scene effects
+        self.tank_width = tank_width
         self.x = -300
         self.y = BG_Y
         self.speed = 0.6 * BG_SCALE
         self.length = 350 * BG_SCALE
         self.height = 60 * BG_SCALE
         self.torpedoes = []
-        self.wall_x = WIDTH * 0.75
+        self.wall_x = tank_width * 0.75
         self.wall_health = 100
         self.explosions = []
         self.wake_particles = []
@@ -502,9 +553,9 @@ class BackgroundBattleship:
             if t['bubble_timer'] % 5 == 0:
                 self.wake_particles.append({
                     'x': t['x'] - 15,
-                    'y': t['y'] + random.randint(-5, 5),
+                    'y': t['y'] + self.rng.randint(-5, 5),
                     'life': 30,
-                    'size': random.randint(2, 5)
+                    'size': self.rng.randint(2, 5)
                 })
             
             if t['x'] > self.wall_x and self.wall_health > 0:
@@ -514,12 +565,12 @@ class BackgroundBattleship:
                 for _ in range(30):
                     self.explosions.append({
                         'x': self.wall_x,
-                        'y': t['y'] + random.randint(-30, 30),
-                        'vx': random.uniform(-4, 2),
-                        'vy': random.uniform(-3, 3),
-                        'life': random.randint(30, 60),
-                        'size': random.randint(5, 15),
-                        'type': 'water' if random.random() > 0.5 else 'fire'
+                        'y': t['y'] + self.rng.randint(-30, 30),
+                        'vx': self.rng.uniform(-4, 2),
+                        'vy': self.rng.uniform(-3, 3),
+                        'life': self.rng.randint(30, 60),
+                        'size': self.rng.randint(5, 15),
+                        'type': 'water' if self.rng.random() > 0.5 else 'fire'
                     })
         
         # Update wake particles
@@ -542,14 +593,14 @@ class BackgroundBattleship:
                 self.explosions.remove(e)
         
         # Reset
-        if self.x > WIDTH + 400:
+        if self.x > self.tank_width + 400:
             self.x = -350
             self.wall_health = 100
             self.torpedoes = []
             self.explosions = []
             self.wake_particles = []
         
-    def draw(self, screen):
+    def draw(self, screen, rng=random):
         ship_gray = (100, 105, 115)
         ship_dark = (60, 65, 75)
         
@@ -639,13 +690,15 @@ class BackgroundBattleship:
             if e['type'] == 'water':
                 e_color = (150, 200, 230)
             else:
-                e_color = (255, random.randint(100, 180), 50)
+                e_color = (255, rng.randint(100, 180), 50)
             pygame.draw.circle(screen, e_color, (int(e['x']), int(e['y'])), int(e['size'] * BG_SCALE))
 
 
 class BackgroundShuttle:
     """Space shuttle launch - right is up"""
-    def __init__(self):
+    def __init__(self, rng=random, tank_width=WIDTH):
+        self.rng = rng    # Random stream for scene effects
+        self.tank_width = tank_width
         self.reset()
         
     def reset(self):
@@ -658,12 +711,12 @@ class BackgroundShuttle:
         self.length = 100 * BG_SCALE
         self.main_tank_attached = True
         self.boosters_attached = True
-        self.booster_sep_x = WIDTH * 0.3
-        self.tank_sep_x = WIDTH * 0.625  # 5/8 across
+        self.booster_sep_x = self.tank_width * 0.3
+        self.tank_sep_x = self.tank_width * 0.625  # 5/8 across
         self.flame_flicker = 0
         self.boosters = []  # Detached boosters
         self.main_tank = None  # Detached tank
-        self.target_x = WIDTH * 0.85
+        self.target_x = self.tank_width * 0.85
         self.laser_charging = False
         self.laser_charge = 0
         self.laser_firing = False
@@ -675,7 +728,7 @@ class BackgroundShuttle:
         if self.mission_complete:
             # Drift off screen
             self.x += 2
-            if self.x > WIDTH + 200:
+            if self.x > self.tank_width + 200:
                 self.reset()
             return
         
@@ -740,14 +793,14 @@ class BackgroundShuttle:
         if self.laser_firing and self.target_health > 0:
             self.target_health -= 5
             # Explosion particles at target
-            if random.random() > 0.5:
+            if self.rng.random() > 0.5:
                 self.explosions.append({
-                    'x': self.target_x + random.randint(-20, 20),
-                    'y': self.y + random.randint(-40, 40),
-                    'vx': random.uniform(-2, 2),
-                    'vy': random.uniform(-2, 2),
-                    'life': random.randint(15, 30),
-                    'size': random.randint(5, 12)
+                    'x': self.target_x + self.rng.randint(-20, 20),
+                    'y': self.y + self.rng.randint(-40, 40),
+                    'vx': self.rng.uniform(-2, 2),
+                    'vy': self.rng.uniform(-2, 2),
+                    'life': self.rng.randint(15, 30),
+                    'size': self.rng.randint(5, 12)
                 })
             if self.target_health <= 0:
                 self.laser_firing = False
@@ -756,10 +809,10 @@ class BackgroundShuttle:
                     self.explosions.append({
                         'x': self.target_x,
                         'y': self.y,
-                        'vx': random.uniform(-6, 6),
-                        'vy': random.uniform(-6, 6),
-                        'life': random.randint(30, 60),
-                        'size': random.randint(8, 20)
+                        'vx': self.rng.uniform(-6, 6),
+                        'vy': self.rng.uniform(-6, 6),
+                        'life': self.rng.randint(30, 60),
+                        'size': self.rng.randint(8, 20)
                     })
                 self.mission_complete = True
         
@@ -771,7 +824,7 @@ class BackgroundShuttle:
             if e['life'] <= 0:
                 self.explosions.remove(e)
         
-    def draw(self, screen):
+    def draw(self, screen, rng=random):
         shuttle_white = (230, 230, 235)
         shuttle_dark = (60, 60, 70)
         tank_orange = (210, 120, 50)
@@ -900,171 +953,124 @@ class BackgroundShuttle:
         
         # Explosions
         for e in self.explosions:
-            e_color = (255, random.randint(100, 200), 50)
+            e_color = (255, rng.randint(100, 200), 50)
             pygame.draw.circle(screen, e_color, (int(e['x']), int(e['y'])), int(e['size'] * BG_SCALE))
 
 
-# Initialize background scenes
-bg_whale = BackgroundWhale()
-bg_tank = BackgroundTank()
-bg_jet = BackgroundJet()
-bg_battleship = BackgroundBattleship()
-bg_shuttle = BackgroundShuttle()
-
-# Clock for controlling frame rate
-clock = pygame.time.Clock()
-FPS = 60
-
-# Rock structures - each rock is (x, y, width, height)
-rocks = [
-    pygame.Rect(100, 675, 200, 75),   # Half height
-    pygame.Rect(350, 650, 180, 100),  # Half height
-    pygame.Rect(600, 685, 150, 65),   # Half height
-    pygame.Rect(900, 670, 220, 90),   # Half height
-]
-
-# Generate rock details ONCE (so they don't flicker)
-rock_details = []
-for rock in rocks:
-    cracks = []
-    for i in range(3):
-        start_x = rock.x + random.randint(10, rock.width - 10)
-        start_y = rock.y + random.randint(10, rock.height - 10)
-        end_x = start_x + random.randint(-30, 30)
-        end_y = start_y + random.randint(20, 50)
-        cracks.append(((start_x, start_y), (end_x, end_y)))
-    rock_details.append(cracks)
-
-# Generate sand grain positions ONCE
-sand_grains = []
-for _ in range(100):
-    x = random.randint(0, WIDTH)
-    y = random.randint(700, HEIGHT)
-    grain_color = (
-        SAND_COLOR[0] + random.randint(-20, 20),
-        SAND_COLOR[1] + random.randint(-20, 20),
-        SAND_COLOR[2] + random.randint(-20, 20)
-    )
-    sand_grains.append((x, y, grain_color))
-
 # Fish class
 
 
 class Fish:
-    def __init__(self, x, y, color, size=15, speed=2):
+    __slots__ = ("x", "y", "prev_x", "prev_y", "color", "size", "speed",
+                 "base_speed", "angle", "is_herbivore", "breed_partner",
+                 "breed_ready_tick")
+
+    def __init__(self, x, y, color, size=15, speed=2, rng=random):
         self.x = x
         self.y = y
+        self.prev_x = x    # Position at the previous tick, for interpolated drawing
+        self.prev_y = y
         self.color = color
         self.size = size
         self.base_speed = speed
         self.speed = speed
-        self.angle = random.uniform(0, 2 * math.pi)
+        self.angle = rng.uniform(0, 2 * math.pi)
         self.is_herbivore = False
         self.breed_partner = None    # Assigned breeding partner
-        self.breed_cooldown = 0    # Time until can breed again
+        self.breed_ready_tick = 0    # Tick when it can breed again
 
-    def find_nearest_food(self, food_list):
+    def find_nearest_food(self, food_grid):
         """Find closest food particle"""
-        nearest = None
-        min_dist = 300  # Look for food from far away!
-        for food in food_list:
-            if not food.eaten:
-                dist = math.sqrt((self.x - food.x)**2 + (self.y - food.y)**2)
-                if dist < min_dist:
-                    min_dist = dist
-                    nearest = food
-        return nearest
-
-    def find_nearest_algae(self, algae_list):
+        # Look for food from far away! (the grid only holds uneaten food)
+        return food_grid.nearest(self.x, self.y, 300)
+
+    def find_nearest_algae(self, algae_grid):
         """Find closest algae patch"""
-        nearest = None
-        min_dist = 300  # Look for algae from far away!
-        for algae in algae_list:
-            dist = math.sqrt((self.x - algae.x)**2 + (self.y - algae.y)**2)
-            if dist < min_dist:
-                min_dist = dist
-                nearest = algae
-        return nearest
-
-    def update(self, food_list, chemistry, algae_list):
-        """Update fish position and movement"""
-        # Adjust speed based on water quality
-        self.speed = self.base_speed * chemistry.affects_fish_health()
+        # Look for algae from far away!
+        return algae_grid.nearest(self.x, self.y, 300)
 
+    def update(self, world):
+        """Update fish position and movement (eating happens in World.consume)"""
+        target = self.forage(world)
+        self.steer(target, world.fish_health, world.width, world.sim_rng)
+
+    def eat(self, world):
+        """Eat whatever is in range; returns True if any food pellet was eaten"""
         # Herbivores eat algae if in range
         if self.is_herbivore:
-            for algae in algae_list:
-                dist = math.sqrt((self.x - algae.x)**2 + (self.y - algae.y)**2)
-                if dist < 40:
-                    algae.shrink(3.0)
+            for algae in world.algae_grid.query_radius(self.x, self.y, 40):
+                algae.shrink(3.0)
+                if algae.is_dead():
+                    world.remove_algae(algae)
+            return False
 
         # Non-herbivores eat food pellets if in range
-        else:
-            for food in food_list:
-                if not food.eaten:
-                    dist = math.sqrt((self.x - food.x)**2 +
-                                     (self.y - food.y)**2)
-                    if dist < self.size + 10:
-                        food.eaten = True
+        pellets = world.food_grid.query_radius(self.x, self.y, self.size + 10)
+        for food in pellets:
+            food.eaten = True
+        return bool(pellets)
+
+    def forage(self, world):
+        """Breed if possible and pick food to swim toward"""
+        food_grid = world.food_grid
+        algae_grid = world.algae_grid
+        rng = world.sim_rng
 
         # Breeding - check if near partner
-        self.breed_cooldown = max(0, self.breed_cooldown - 1)
-        if self.breed_partner and self.breed_cooldown == 0:
-            dist_to_partner = math.sqrt(
-                (self.x - self.breed_partner.x)**2 +
-                (self.y - self.breed_partner.y)**2
-            )
-            if dist_to_partner < 50:    # Close enough to breed
-                # Spawn 3 feeder fish!
+        if self.breed_partner and world.ticks >= self.breed_ready_tick:
+            dx = self.x - self.breed_partner.x
+            dy = self.y - self.breed_partner.y
+            if dx * dx + dy * dy < 50 * 50:    # Close enough to breed
+                # Spawn 3 feeder fish! (fewer when the tank is getting full)
                 baby_x = (self.x + self.breed_partner.x) / 2
                 baby_y = (self.y + self.breed_partner.y) / 2
 
             # Spawn them with slight position variation
-                for i in range(3):
-                    offset_x = random.randint(-15, 15)
-                    offset_y = random.randint(-15, 15)
-                    feeder_fish_list.append(FeederFish(
-                        baby_x + offset_x, baby_y + offset_y))
+                for i in range(world.births_allowed("feeders", 3)):
+                    offset_x = rng.randint(-15, 15)
+                    offset_y = rng.randint(-15, 15)
+                    world.spawn_feeder(baby_x + offset_x, baby_y + offset_y)
 
-                self.breed_cooldown = 600    # 10 second cooldown
-                self.breed_partner.breed_cooldown = 600
+                self.breed_ready_tick = world.ticks + 600    # 10 second cooldown
+                self.breed_partner.breed_ready_tick = self.breed_ready_tick
 
         # Fish actively seek their preferred food (but not when near edges)
         target = None
-        near_boundary = (self.x < 80 or self.x > WIDTH - 80 or
+        near_boundary = (self.x < 80 or self.x > world.width - 80 or
                          self.y < 80 or self.y > 630)
 
         if not near_boundary:
             if self.is_herbivore:
                 # Herbivores seek algae
-                target = self.find_nearest_algae(algae_list)
+                target = self.find_nearest_algae(algae_grid)
             else:
                 # Non-herbivores seek food pellets
-                target = self.find_nearest_food(food_list)
+                target = self.find_nearest_food(food_grid)
+        return target
+
+    def steer(self, target, health, width, rng):
+        """Swim toward the target (or wander), move and bounce off the walls"""
+        # Adjust speed based on water quality
+        self.speed = self.base_speed * health
 
         # If target found, swim toward it
         if target:
             dx = target.x - self.x
             dy = target.y - self.y
-            dist_to_target = math.sqrt(dx**2 + dy**2)
 
             # Only turn toward target if not too close (prevents jittering)
-            if dist_to_target > 30:
+            if dx * dx + dy * dy > 30 * 30:
                 target_angle = math.atan2(dy, dx)
 
-                # Smoothly turn toward target
-                angle_diff = target_angle - self.angle
-                while angle_diff > math.pi:
-                    angle_diff -= 2 * math.pi
-                while angle_diff < -math.pi:
-                    angle_diff += 2 * math.pi
+                # Smoothly turn toward target (difference wrapped into [-pi, pi))
+                angle_diff = (target_angle - self.angle + math.pi) % (2 * math.pi) - math.pi
                 self.angle += angle_diff * 0.15
             else:
                 # Very close - just wander a bit
-                self.angle += random.uniform(-0.02, 0.02)
+                self.angle += rng.uniform(-0.02, 0.02)
         else:
             # No food nearby, wander normally
-            self.angle += random.uniform(-0.05, 0.05)
+            self.angle += rng.uniform(-0.05, 0.05)
 
         # Move in current direction
         self.x += math.cos(self.angle) * self.speed
@@ -1072,20 +1078,20 @@ class Fish:
 
         # Bounce off boundaries
         if self.x < 50:
-            self.angle = random.uniform(-0.5, 0.5)
+            self.angle = rng.uniform(-0.5, 0.5)
             self.x = 50
-        elif self.x > WIDTH - 50:
-            self.angle = random.uniform(2.6, 3.6)
-            self.x = WIDTH - 50
+        elif self.x > width - 50:
+            self.angle = rng.uniform(2.6, 3.6)
+            self.x = width - 50
 
         if self.y < 50:
-            self.angle = random.uniform(-0.5, 0.5)
+            self.angle = rng.uniform(-0.5, 0.5)
             self.y = 50
         elif self.y > 650:
-            self.angle = random.uniform(2.6, 3.6)
+            self.angle = rng.uniform(2.6, 3.6)
             self.y = 650
 
-    def draw(self, screen):
+    def draw(self, screen, fish_style):
         """Draw the fish based on current style"""
         if fish_style == 0:
             self.draw_realistic(screen)
@@ -1378,16 +1384,15 @@ class Fish:
         pygame.draw.polygon(screen, base_green, body_points)
         
         # Camo pattern spots
-        random.seed(int(self.x * 100 + self.y))  # Consistent pattern per fish
+        camo_rng = random.Random(int(self.x * 100 + self.y))  # Consistent pattern per fish
         for _ in range(8):
-            spot_offset_x = random.uniform(-0.6, 0.4) * body_length
-            spot_offset_y = random.uniform(-0.3, 0.3) * body_height
+            spot_offset_x = camo_rng.uniform(-0.6, 0.4) * body_length
+            spot_offset_y = camo_rng.uniform(-0.3, 0.3) * body_height
             spot_x = cx + spot_offset_x * math.cos(self.angle) - spot_offset_y * math.sin(self.angle)
             spot_y = cy + spot_offset_x * math.sin(self.angle) + spot_offset_y * math.cos(self.angle)
-            spot_color = random.choice(camo_colors)
-            spot_size = random.randint(3, 7)
+            spot_color = camo_rng.choice(camo_colors)
+            spot_size = camo_rng.randint(3, 7)
             pygame.draw.circle(screen, spot_color, (int(spot_x), int(spot_y)), spot_size)
-        random.seed()  # Reset seed
         
         # Tail fin
         tail_x = cx - math.cos(self.angle) * body_length * 0.5
@@ -1664,30 +1669,32 @@ class Fish:
 
 
 class FeederFish:
-    def __init__(self, x, y):
+    __slots__ = ("x", "y", "prev_x", "prev_y", "color", "size", "speed",
+                 "base_speed", "angle", "timers", "invulnerable_until",
+                 "being_chased", "chase_fatigue", "alive")
+
+    def __init__(self, x, y, timers, rng=random, size=10, speed=2):
         self.x = x
         self.y = y
+        self.prev_x = x
+        self.prev_y = y
         self.color = (255, 50, 50)    # Red
-        self.size = 10
-        self.base_speed = 2    # Faster than predators initially
-        self.speed = 2
-        self.angle = random.uniform(0, 2 * math.pi)
-        self.invulnerable_timer = 300   # 5 seconds at 60 FPS before targetable
+        self.size = size
+        self.base_speed = speed    # Faster than predators initially
+        self.speed = speed
+        self.angle = rng.uniform(0, 2 * math.pi)
+        self.timers = timers    # The World's TimerQueue (its clock)
+        self.invulnerable_until = timers.now + 300   # 5 seconds at 60 FPS before targetable
         self.being_chased = False
         self.chase_fatigue = 0    # Increases when being chased
+        self.alive = True    # Cleared when caught; the World drops it at the end of the tick
 
-    def update(self, predator_list):
+    def update(self, world):
         """Update feeder fish movement"""
-        # Count down invulnerability
-        if self.invulnerable_timer > 0:
-            self.invulnerable_timer -= 1
+        rng = world.sim_rng
 
         # Check if being chased
-        self.being_chased = False
-        for predator in predator_list:
-            if predator.target == self:
-                self.being_chased = True
-                break
+        self.being_chased = self in world.chasers
 
         # Speed decay when being chased
         if self.being_chased:
@@ -1699,7 +1706,7 @@ class FeederFish:
             self.speed = self.base_speed - self.chase_fatigue
 
         # Simple wandering
-        self.angle += random.uniform(-0.08, 0.08)
+        self.angle += rng.uniform(-0.08, 0.08)
 
         # Move
         self.x += math.cos(self.angle) * self.speed
@@ -1707,23 +1714,28 @@ class FeederFish:
 
         # Bounce off boundaries
         if self.x < 50:
-            self.angle = random.uniform(-0.5, 0.5)
+            self.angle = rng.uniform(-0.5, 0.5)
             self.x = 50
-        elif self.x > WIDTH - 50:
-            self.angle = random.uniform(2.6, 3.6)
-            self.x = WIDTH - 50
+        elif self.x > world.width - 50:
+            self.angle = rng.uniform(2.6, 3.6)
+            self.x = world.width - 50
         if self.y < 50:
-            self.angle = random.uniform(-0.5, 0.5)
+            self.angle = rng.uniform(-0.5, 0.5)
             self.y = 50
         elif self.y > 650:
-            self.angle = random.uniform(2.6, 3.6)
+            self.angle = rng.uniform(2.6, 3.6)
             self.y = 650
 
+    @property
+    def invulnerable_timer(self):
+        """Ticks of invulnerability left"""
+        return max(0, self.invulnerable_until - self.timers.now)
+
     def is_targetable(self):
         """Can only be targeted after invulnerability timer expires"""
-        return self.invulnerable_timer <= 0
+        return self.timers.now >= self.invulnerable_until
 
-    def draw(self, screen):
+    def draw(self, screen, fish_style):
         """Draw feeder fish based on current style"""
         # Handle invulnerability flash
         if self.invulnerable_timer > 0 and self.invulnerable_timer % 20 < 10:
@@ -1889,12 +1901,11 @@ class FeederFish:
         pygame.draw.polygon(screen, base_green, body_points)
         
         # Small camo spots
-        random.seed(int(self.x * 100 + self.y))
+        camo_rng = random.Random(int(self.x * 100 + self.y))
         for _ in range(4):
-            spot_x = cx + random.uniform(-0.5, 0.3) * self.size
-            spot_y = cy + random.uniform(-0.3, 0.3) * self.size
-            pygame.draw.circle(screen, random.choice(camo_colors), (int(spot_x), int(spot_y)), 2)
-        random.seed()
+            spot_x = cx + camo_rng.uniform(-0.5, 0.3) * self.size
+            spot_y = cy + camo_rng.uniform(-0.3, 0.3) * self.size
+            pygame.draw.circle(screen, camo_rng.choice(camo_colors), (int(spot_x), int(spot_y)), 2)
         
         # Tail
         tail_x = cx - math.cos(self.angle) * self.size * 0.8
@@ -2016,52 +2027,800 @@ class FeederFish:
         pygame.draw.circle(screen, navy_white, (int(eye_x), int(eye_y)), 3)
         pygame.draw.circle(screen, navy_blue, (int(eye_x), int(eye_y)), 3, 1)
 
+# Schooling (boids on a neighbour grid)
+
+SCHOOL_CELL = 50            # Grid cell (px); a feeder's neighbours are the 3x3 cells around it
+SCHOOL_COHESION = 0.004     # Pull towards the neighbours' centre, per px away
+SCHOOL_ALIGNMENT = 0.5      # Pull towards the neighbours' mean heading
+SCHOOL_SEPARATION = 0.003   # Push out of a crowded cell, per px per cellmate
+SCHOOL_FLEE = 3.0           # Push away from a predator right next to it
+SCHOOL_FLEE_RADIUS = 120    # Predators further away than this are ignored
+SCHOOL_TURN = 0.1           # Share of the heading change turned each tick
+
+
+def school_heading(x, y, angle, block, own, flee_x, flee_y):
+    """New heading for one feeder from its cell totals (see school_feeders)"""
+    head_x, head_y = math.cos(angle), math.sin(angle)
+    steer_x, steer_y = head_x + flee_x, head_y + flee_y
+    # Neighbourhood totals without the fish itself
+    n, sum_x, sum_y, sum_hx, sum_hy = block
+    if n > 1:
+        others = n - 1
+        steer_x += ((sum_x - x) / others - x) * SCHOOL_COHESION
+        steer_y += ((sum_y - y) / others - y) * SCHOOL_COHESION
+        steer_x += (sum_hx - head_x) / others * SCHOOL_ALIGNMENT
+        steer_y += (sum_hy - head_y) / others * SCHOOL_ALIGNMENT
+    n, sum_x, sum_y = own[:3]
+    if n > 1:
+        others = n - 1
+        steer_x += (x - (sum_x - x) / others) * SCHOOL_SEPARATION * others
+        steer_y += (y - (sum_y - y) / others) * SCHOOL_SEPARATION * others
+    turn = (math.atan2(steer_y, steer_x) - angle + math.pi) % (2 * math.pi) - math.pi
+    return angle + turn * SCHOOL_TURN
+
+
+def school_feeders(feeders, predators, cell=SCHOOL_CELL):
+    """Turn every feeder towards its school and away from predators
+
+    Feeders are bucketed into a grid of `cell` px squares that keep totals
+    (count, position, heading). Each feeder steers by the totals of the 3x3
+    block of cells around it: towards their centre (cohesion) and mean
+    heading (alignment), and out of the middle of its own cell when that's
+    crowded (separation). Feeders near a predator also swim away from it.
+    Nobody is ever compared with every other fish, so the cost grows with
+    the number of fish, not its square. FeederSwarm.school is the array
+    version.
+    """
+    cells = {}
+    keys = []
+    for feeder in feeders:
+        key = (int(feeder.x // cell), int(feeder.y // cell))
+        keys.append(key)
+        totals = cells.get(key)
+        if totals is None:
+            totals = cells[key] = [0, 0.0, 0.0, 0.0, 0.0, []]
+        totals[0] += 1
+        totals[1] += feeder.x
+        totals[2] += feeder.y
+        totals[3] += math.cos(feeder.angle)
+        totals[4] += math.sin(feeder.angle)
+        totals[5].append(feeder)
+
+    # Totals over the 3x3 block around every occupied cell
+    blocks = {}
+    for col, row in cells:
+        block = [0, 0.0, 0.0, 0.0, 0.0]
+        for near_col in (col - 1, col, col + 1):
+            for near_row in (row - 1, row, row + 1):
+                totals = cells.get((near_col, near_row))
+                if totals is not None:
+                    for i in range(5):
+                        block[i] += totals[i]
+        blocks[col, row] = block
+
+    # Only the feeders in cells around a predator can be close enough to flee
+    flee = {}
+    reach = int(SCHOOL_FLEE_RADIUS // cell) + 1
+    for predator in predators:
+        col, row = int(predator.x // cell), int(predator.y // cell)
+        for near_col in range(col - reach, col + reach + 1):
+            for near_row in range(row - reach, row + reach + 1):
+                totals = cells.get((near_col, near_row))
+                if totals is None:
+                    continue
+                for feeder in totals[5]:
+                    dx = feeder.x - predator.x
+                    dy = feeder.y - predator.y
+                    dist = math.sqrt(dx * dx + dy * dy)
+                    if 0 < dist < SCHOOL_FLEE_RADIUS:
+                        push = SCHOOL_FLEE * (1 - dist / SCHOOL_FLEE_RADIUS) / dist
+                        fx, fy = flee.get(feeder, (0.0, 0.0))
+                        flee[feeder] = (fx + dx * push, fy + dy * push)
+
+    for feeder, key in zip(feeders, keys):
+        flee_x, flee_y = flee.get(feeder, (0.0, 0.0))
+        feeder.angle = school_heading(feeder.x, feeder.y, feeder.angle,
+                                      blocks[key], cells[key], flee_x, flee_y)
+
+# Vectorized backend (NumPy)
+
+
+def numpy_rng(seed):
+    """NumPy generator for a derived seed string (None keeps it unseeded)"""
+    return np.random.default_rng(random.Random(seed).getrandbits(64))
+
+
+def bounce_off_walls(x, y, angle, width, rng):
+    """Array version of the fish wall bounce; x, y and angle change in place
+
+    A fish in a corner ends up with the vertical wall's new heading, just
+    like the if/elif pairs in the update methods.
+    """
+    for mask, low, high, wall, position in (
+            (x < 50, -0.5, 0.5, 50, x),
+            (x > width - 50, 2.6, 3.6, width - 50, x),
+            (y < 50, -0.5, 0.5, 50, y),
+            (y > 650, 2.6, 3.6, 650, y)):
+        hits = np.count_nonzero(mask)
+        if hits:
+            angle[mask] = rng.uniform(low, high, hits)
+            position[mask] = wall
+
+
+def steer_breeders(fish_list, targets, health, width, rng):
+    """Fish.steer for every breeder at once
+
+    Positions and headings are gathered into arrays, turned, moved and
+    bounced in one pass, then written back to the fish.
+    """
+    n = len(fish_list)
+    if n == 0:
+        return
+    x = np.fromiter((fish.x for fish in fish_list), float, n)
+    y = np.fromiter((fish.y for fish in fish_list), float, n)
+    angle = np.fromiter((fish.angle for fish in fish_list), float, n)
+    speed = np.fromiter((fish.base_speed for fish in fish_list), float, n) * health
+    has_target = np.fromiter((target is not None for target in targets), bool, n)
+    target_x = np.fromiter((target.x if target else 0.0 for target in targets), float, n)
+    target_y = np.fromiter((target.y if target else 0.0 for target in targets), float, n)
+
+    # Turn toward targets further than 30px away, otherwise wander (less
+    # when sitting on a target)
+    dx = target_x - x
+    dy = target_y - y
+    turning = has_target & (dx * dx + dy * dy > 30 * 30)
+    angle_diff = (np.arctan2(dy, dx) - angle + math.pi) % (2 * math.pi) - math.pi
+    wander = rng.uniform(-1.0, 1.0, n) * np.where(has_target, 0.02, 0.05)
+    angle += np.where(turning, angle_diff * 0.15, wander)
+
+    # Move in current direction and bounce off boundaries
+    x += np.cos(angle) * speed
+    y += np.sin(angle) * speed
+    bounce_off_walls(x, y, angle, width, rng)
+
+    for fish, fx, fy, fangle, fspeed in zip(fish_list, x.tolist(), y.tolist(),
+                                            angle.tolist(), speed.tolist()):
+        fish.x = fx
+        fish.y = fy
+        fish.angle = fangle
+        fish.speed = fspeed
+
+
+def swarm_field(name, convert=float):
+    """Property reading/writing one row of a FeederSwarm array"""
+    def get(self):
+        return convert(getattr(self.swarm, name)[self.index])
+
+    def set(self, value):
+        getattr(self.swarm, name)[self.index] = value
+    return property(get, set)
+
+
+class SwarmFeeder(FeederFish):
+    """A FeederFish whose moving state lives in a FeederSwarm's arrays
+
+    Drawing, targeting and catching use it exactly like a FeederFish; only
+    its row index changes when other feeders are removed.
+    """
+    x = swarm_field("x")
+    y = swarm_field("y")
+    prev_x = swarm_field("prev_x")
+    prev_y = swarm_field("prev_y")
+    angle = swarm_field("angle")
+    speed = swarm_field("speed")
+    base_speed = swarm_field("base_speed")
+    chase_fatigue = swarm_field("chase_fatigue")
+    invulnerable_until = swarm_field("invulnerable_until", int)
+    being_chased = swarm_field("being_chased", bool)
+
+    __slots__ = ("swarm", "index")
+
+    def __init__(self, swarm, index, size):
+        self.swarm = swarm
+        self.timers = swarm.timers
+        self.index = index
+        self.color = (255, 50, 50)    # Red
+        self.size = size
+        self.alive = True
+
+    def update(self, world):
+        raise RuntimeError("swarm feeders are updated together by FeederSwarm.update()")
+
+
+def consume_batched(fish_list, food_list, algae_list, block=256):
+    """Fish.eat for every breeder at once, with blocked distance matrices
+
+    Fish are taken `block` at a time against every pellet / patch, so the
+    matrices stay small however big the tank gets. Returns the eaten food
+    and the algae patches that were bitten.
+    """
+    eaters = [fish for fish in fish_list if not fish.is_herbivore]
+    grazers = [fish for fish in fish_list if fish.is_herbivore]
+
+    eaten = []
+    bitten = []
+    if eaters and food_list:
+        food_x = np.fromiter((food.x for food in food_list), float, len(food_list))
+        food_y = np.fromiter((food.y for food in food_list), float, len(food_list))
+        hit = np.zeros(len(food_list), bool)
+        for start in range(0, len(eaters), block):
+            fish = eaters[start:start + block]
+            fx = np.fromiter((f.x for f in fish), float, len(fish))[:, None]
+            fy = np.fromiter((f.y for f in fish), float, len(fish))[:, None]
+            reach = np.fromiter((f.size + 10 for f in fish), float, len(fish))[:, None]
+            hit |= ((food_x - fx) ** 2 + (food_y - fy) ** 2 < reach * reach).any(axis=0)
+        for i in np.flatnonzero(hit).tolist():
+            food_list[i].eaten = True
+            eaten.append(food_list[i])
+
+    if grazers and algae_list:
+        algae_x = np.fromiter((algae.x for algae in algae_list), float, len(algae_list))
+        algae_y = np.fromiter((algae.y for algae in algae_list), float, len(algae_list))
+        bites = np.zeros(len(algae_list), np.int64)
+        for start in range(0, len(grazers), block):
+            fish = grazers[start:start + block]
+            fx = np.fromiter((f.x for f in fish), float, len(fish))[:, None]
+            fy = np.fromiter((f.y for f in fish), float, len(fish))[:, None]
+            bites += ((algae_x - fx) ** 2 + (algae_y - fy) ** 2 < 40 * 40).sum(axis=0)
+        # Every herbivore in range takes its own bite
+        for i in np.flatnonzero(bites).tolist():
+            algae_list[i].shrink(3.0 * bites[i])
+            bitten.append(algae_list[i])
+    return eaten, bitten
+
+
+def chase_predators(world):
+    """PredatorFish.update for every predator at once; returns the catches
+
+    Targets are picked one predator at a time (claims depend on order), then
+    pursuit headings, catch distances and movement are worked out as arrays.
+    A predator that catches its prey doesn't move that tick. Catches come
+    back as (predator, feeder) pairs; if two predators ever reach the same
+    feeder, the first in the list gets it.
+    """
+    predators = world.predator_fish_list
+    n = len(predators)
+    if n == 0:
+        return []
+    for predator in predators:
+        predator.find_target(world)
+    targets = [predator.target for predator in predators]
+
+    x = np.fromiter((predator.x for predator in predators), float, n)
+    y = np.fromiter((predator.y for predator in predators), float, n)
+    angle = np.fromiter((predator.angle for predator in predators), float, n)
+    speed = np.fromiter((predator.speed for predator in predators), float, n)
+    size = np.fromiter((predator.size for predator in predators), float, n)
+    has_target = np.fromiter((target is not None for target in targets), bool, n)
+    target_x = np.fromiter((target.x if target else 0.0 for target in targets), float, n)
+    target_y = np.fromiter((target.y if target else 0.0 for target in targets), float, n)
+
+    # Chase: turn toward targets further than 15px away; wander with none
+    dx = target_x - x
+    dy = target_y - y
+    dist_sq = dx * dx + dy * dy
+    turning = has_target & (dist_sq > 15 * 15)
+    angle_diff = (np.arctan2(dy, dx) - angle + math.pi) % (2 * math.pi) - math.pi
+    wander = np.where(has_target, 0.0, world.steering_rng.uniform(-0.05, 0.05, n))
+    angle += np.where(turning, angle_diff * 0.12, wander)
+
+    # Catches, resolved in predator order so each feeder is caught once
+    catches = []
+    caught_feeders = set()
+    caught = has_target & (dist_sq < size * size)
+    for i in np.flatnonzero(caught).tolist():
+        if targets[i] not in caught_feeders:
+            caught_feeders.add(targets[i])
+            catches.append((predators[i], targets[i]))
+
+    # Everyone else moves, then bounces off the walls
+    moving = ~caught
+    x[moving] += np.cos(angle[moving]) * speed[moving]
+    y[moving] += np.sin(angle[moving]) * speed[moving]
+    bounce_off_walls(x, y, angle, world.width, world.steering_rng)
+
+    for predator, px, py, pangle in zip(predators, x.tolist(), y.tolist(), angle.tolist()):
+        predator.x = px
+        predator.y = py
+        predator.angle = pangle
+    return catches
+
+
+class FeederSwarm:
+    """Every feeder fish as parallel NumPy arrays, updated in a few array ops per tick
+
+    Follows the same rules as FeederFish.update (chase fatigue, wandering,
+    bouncing off the walls); the random wandering comes
+    from a NumPy generator, so runs match the object backend statistically
+    rather than fish for fish. Rows are kept packed: a removed feeder's row
+    is filled by the last one.
+    """
+    FIELDS = ("x", "y", "prev_x", "prev_y", "angle", "speed", "base_speed",
+              "chase_fatigue", "invulnerable_until", "being_chased")
+
+    def __init__(self, timers, seed=None, capacity=256):
+        self.timers = timers
+        # Seeded from its own named stream, like the World's random.Random streams
+        self.rng = numpy_rng(seed)
+        self.count = 0
+        self.feeders = []    # SwarmFeeder for each row, in row order
+        self.pending = []    # (x, y, size, speed) waiting for the end of the tick
+        self.allocate(capacity)
+
+    def allocate(self, capacity):
+        """(Re)size every array to capacity rows, keeping the live ones"""
+        for name in self.FIELDS:
+            dtype = np.int64 if name == "invulnerable_until" else (
+                np.bool_ if name == "being_chased" else np.float64)
+            array = np.zeros(capacity, dtype=dtype)
+            old = getattr(self, name, None)
+            if old is not None:
+                array[:self.count] = old[:self.count]
+            setattr(self, name, array)
+        self.capacity = capacity
+
+    def spawn(self, x, y, size, speed):
+        """Queue a newborn; it gets a row when apply() runs"""
+        self.pending.append((x, y, size, speed))
+
+    def apply(self):
+        """Swap-remove dead feeders, then give queued newborns their rows"""
+        for feeder in [feeder for feeder in self.feeders if not feeder.alive]:
+            self.remove(feeder)
+
+        if not self.pending:
+            return
+        needed = self.count + len(self.pending)
+        if needed > self.capacity:
+            self.allocate(max(needed, self.capacity * 2))
+        start = self.count
+        rows = slice(start, needed)
+        xs, ys, sizes, speeds = zip(*self.pending)
+        self.x[rows] = xs
+        self.y[rows] = ys
+        self.prev_x[rows] = xs
+        self.prev_y[rows] = ys
+        self.angle[rows] = self.rng.uniform(0, 2 * math.pi, len(xs))
+        self.speed[rows] = speeds
+        self.base_speed[rows] = speeds
+        self.chase_fatigue[rows] = 0
+        self.invulnerable_until[rows] = self.timers.now + 300   # 5 seconds at 60 FPS before targetable
+        self.being_chased[rows] = False
+        for i, size in enumerate(sizes):
+            self.feeders.append(SwarmFeeder(self, start + i, size))
+        self.count = needed
+        self.pending.clear()
+
+    def remove(self, feeder):
+        """Fill the feeder's row with the last row (order isn't preserved)"""
+        last = self.count - 1
+        index = feeder.index
+        if index != last:
+            for name in self.FIELDS:
+                array = getattr(self, name)
+                array[index] = array[last]
+            moved = self.feeders[last]
+            moved.index = index
+            self.feeders[index] = moved
+        self.feeders.pop()
+        self.count = last
+
+    def snapshot(self):
+        """Remember positions for interpolated drawing"""
+        n = self.count
+        self.prev_x[:n] = self.x[:n]
+        self.prev_y[:n] = self.y[:n]
+
+    def update(self, world):
+        """FeederFish.update for every feeder at once"""
+        n = self.count
+        if n == 0:
+            return
+        x, y, angle = self.x[:n], self.y[:n], self.angle[:n]
+        speed, base_speed = self.speed[:n], self.base_speed[:n]
+        fatigue, chased = self.chase_fatigue[:n], self.being_chased[:n]
+
+        # Check if being chased
+        chased[:] = False
+        for feeder in world.chasers:
+            chased[feeder.index] = True
+
+        # Speed decay when being chased, slow recovery otherwise
+        fatigue[:] = np.where(chased, fatigue + 0.07, np.maximum(0, fatigue - 0.01))
+        speed[:] = np.where(chased, np.maximum(2, base_speed - fatigue), base_speed - fatigue)
+
+        # Simple wandering, then move
+        angle += self.rng.uniform(-0.08, 0.08, n)
+        x += np.cos(angle) * speed
+        y += np.sin(angle) * speed
+        bounce_off_walls(x, y, angle, world.width, self.rng)
+
+    def school(self, predators, cell=SCHOOL_CELL):
+        """school_feeders for every feeder at once, with the cell totals as 2D arrays"""
+        n = self.count
+        if n == 0:
+            return
+        x, y, angle = self.x[:n], self.y[:n], self.angle[:n]
+        head_x, head_y = np.cos(angle), np.sin(angle)
+
+        # Cell totals, with a border of empty cells so every 3x3 block fits
+        cols = (x // cell).astype(np.int64) + 1
+        rows = (y // cell).astype(np.int64) + 1
+        shape = (int(rows.max()) + 2, int(cols.max()) + 2)
+        index = rows * shape[1] + cols
+        size = shape[0] * shape[1]
+        totals = [np.bincount(index, weights, size).reshape(shape)
+                  for weights in (None, x, y, head_x, head_y)]
+
+        # 3x3 block sums of each total, looked up for every fish
+        blocks = []
+        for total in totals:
+            block = np.zeros(shape)
+            for dr in (-1, 0, 1):
+                for dc in (-1, 0, 1):
+                    block[1:-1, 1:-1] += total[1 + dr:shape[0] - 1 + dr, 1 + dc:shape[1] - 1 + dc]
+            blocks.append(block[rows, cols])
+        count, sum_x, sum_y, sum_hx, sum_hy = blocks
+        own_count, own_x, own_y = (total[rows, cols] for total in totals[:3])
+
+        steer_x = head_x.copy()
+        steer_y = head_y.copy()
+        others = np.maximum(count - 1, 1)
+        near = count > 1
+        steer_x += np.where(near, ((sum_x - x) / others - x) * SCHOOL_COHESION
+                            + (sum_hx - head_x) / others * SCHOOL_ALIGNMENT, 0)
+        steer_y += np.where(near, ((sum_y - y) / others - y) * SCHOOL_COHESION
+                            + (sum_hy - head_y) / others * SCHOOL_ALIGNMENT, 0)
+        others = np.maximum(own_count - 1, 1)
+        crowded = own_count > 1
+        steer_x += np.where(crowded, (x - (own_x - x) / others) * SCHOOL_SEPARATION * others, 0)
+        steer_y += np.where(crowded, (y - (own_y - y) / others) * SCHOOL_SEPARATION * others, 0)
+
+        # Only the feeders in cells around a predator can be close enough to
+        # flee. With the fish sorted by cell, each row of cells around a
+        # predator is one slice, found with a binary search
+        if predators:
+            order = np.argsort(index)
+            reach = int(SCHOOL_FLEE_RADIUS // cell) + 1
+            offsets = np.arange(-reach, reach + 1)
+            hunter_x = np.array([predator.x for predator in predators])
+            hunter_y = np.array([predator.y for predator in predators])
+            hunter_rows = (hunter_y // cell).astype(np.int64)[:, None] + 1 + offsets
+            hunter_cols = (hunter_x // cell).astype(np.int64) + 1
+            first_col = np.clip(hunter_cols - reach, 0, shape[1] - 1)[:, None]
+            last_col = np.clip(hunter_cols + reach, 0, shape[1] - 1)[:, None]
+            ok = ((hunter_rows >= 0) & (hunter_rows < shape[0])
+                  & (hunter_cols - reach < shape[1])[:, None] & (hunter_cols + reach >= 0)[:, None])
+            sorted_index = index[order]
+            starts = np.searchsorted(sorted_index, hunter_rows * shape[1] + first_col)
+            stops = np.searchsorted(sorted_index, hunter_rows * shape[1] + last_col + 1)
+            lengths = np.where(ok, stops - starts, 0).ravel()
+            # One (predator, feeder) pair per fish in those slices
+            pairs = int(lengths.sum())
+            ends = np.cumsum(lengths)
+            slots = np.arange(pairs) + np.repeat(starts.ravel() - (ends - lengths), lengths)
+            fish = order[slots]
+            hunter = np.repeat(np.arange(len(predators)).repeat(len(offsets)), lengths)
+            dx = x[fish] - hunter_x[hunter]
+            dy = y[fish] - hunter_y[hunter]
+            dist = np.sqrt(dx * dx + dy * dy)
+            close = (dist > 0) & (dist < SCHOOL_FLEE_RADIUS)
+            push = np.where(close, SCHOOL_FLEE * (1 - dist / SCHOOL_FLEE_RADIUS)
+                            / np.where(close, dist, 1), 0)
+            steer_x += np.bincount(fish, dx * push, n)
+            steer_y += np.bincount(fish, dy * push, n)
+
+        turn = (np.arctan2(steer_y, steer_x) - angle + math.pi) % (2 * math.pi) - math.pi
+        angle += turn * SCHOOL_TURN
+
+
+
+class SwarmGrid:
+    """SpatialGrid's nearest_k and remove for a FeederSwarm's feeders, kept as arrays
+
+    The world's feeder grid with the NumPy backend. fill() sorts the rows of
+    the targetable, unchased feeders by cell, so a row of cells is one slice
+    found with np.searchsorted; nothing is built per feeder. Positions are
+    copied when filled, like the items of a SpatialGrid.
+    """
+    def __init__(self, swarm, cell_size=64):
+        self.swarm = swarm
+        self.cell_size = cell_size
+        self.cols = 1    # Cells per row of the grid
+        self.keys = np.zeros(0, np.int64)    # Cell of each indexed feeder, sorted
+        self.rows = np.zeros(0, np.int64)    # Their rows in the swarm
+        self.x = np.zeros(0)
+        self.y = np.zeros(0)
+        self.removed = np.zeros(0, bool)    # By swarm row
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def fill(self):
+        """Index the swarm's targetable feeders that nobody is chasing"""
+        swarm = self.swarm
+        n = swarm.count
+        targetable = swarm.invulnerable_until[:n] <= swarm.timers.now
+        rows = np.flatnonzero(targetable & ~swarm.being_chased[:n])
+        x, y = swarm.x[rows], swarm.y[rows]
+        cols = np.maximum(x // self.cell_size, 0).astype(np.int64)
+        cell_rows = np.maximum(y // self.cell_size, 0).astype(np.int64)
+        self.cols = int(cols.max()) + 1 if len(rows) else 1
+        keys = cell_rows * self.cols + cols
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.rows = rows[order]
+        self.x = x[order]
+        self.y = y[order]
+        self.removed = np.zeros(n, bool)
+        self.count = len(rows)
+
+    def remove(self, feeder):
+        """Take a feeder out until the next fill() (rows only change between ticks)"""
+        self.removed[feeder.index] = True
+        self.count -= 1
+
+    def nearest_k(self, x, y, k, max_dist):
+        """Up to k feeders nearer than max_dist to (x, y), closest first
+
+        Looks at a square of cells around (x, y) that doubles in size until
+        it holds k feeders no further away than its edge.
+        """
+        if not self.count:
+            return []
+        size = self.cell_size
+        col, row = int(x // size), int(y // size)
+        widest = int(max_dist // size) + 1
+        reach = 1
+        while True:
+            reach = min(reach, widest)
+            first_col = max(0, col - reach)
+            last_col = min(self.cols - 1, col + reach)
+            cell_rows = np.arange(max(0, row - reach), row + reach + 1)
+            starts = np.searchsorted(self.keys, cell_rows * self.cols + first_col)
+            stops = np.searchsorted(self.keys, cell_rows * self.cols + last_col + 1)
+            lengths = np.maximum(stops - starts, 0)
+            ends = np.cumsum(lengths)
+            found = np.arange(ends[-1]) + np.repeat(starts - (ends - lengths), lengths)
+            found = found[~self.removed[self.rows[found]]]
+            dx = self.x[found] - x
+            dy = self.y[found] - y
+            dist_sq = dx * dx + dy * dy
+            near = dist_sq < max_dist * max_dist
+            found, dist_sq = found[near], dist_sq[near]
+            closest = np.argsort(dist_sq, kind="stable")[:k]
+            # Anything outside the square is at least reach cells away
+            edge = reach * size
+            if reach == widest or (len(closest) == k and dist_sq[closest[-1]] <= edge * edge):
+                feeders = self.swarm.feeders
+                return [feeders[i] for i in self.rows[found[closest]].tolist()]
+            reach *= 2
+
+
+# Aggregate feeders (statistical level of detail)
+
+
+def stochastic_round(value, rng):
+    """Round up with probability equal to the fraction, so totals stay right on average"""
+    whole = math.floor(value)
+    return whole + (rng.random() < value - whole)
+
+
+# Ticks a predator takes to turn towards a new target: it turns 12% of
+# the way each tick, so a target off to its side (pi/2, the average) is
+# within a radian of dead ahead after this many ticks
+SHOAL_TURN_LAG = math.log(2 / math.pi) / math.log(1 - 0.12)
+
+
+class FeederShoals:
+    """Feeders beyond the render budget, kept as head counts per tank region
+
+    Once `budget` feeders are swimming individually, newborns join the
+    shoal of the region they were born in instead. Shoals update at a slow
+    rate with rules taken from the individual fish:
+
+    - Mixing: a feeder swims `speed` px a tick, so a fraction speed / cell
+      of each region crosses into a neighbouring one per tick.
+    - Newborns: like an individual newborn, a shoal fish can't be caught
+      for its first 300 ticks. Each tick's newborns wait that out together
+      in one batch (in place; they join the mixing once they mature).
+    - Predation: a predator with no individual to chase hunts the shoal it
+      is in. It goes for the 3rd closest feeder within 400px. A catch takes
+      the time to turn towards it (SHOAL_TURN_LAG), plus either the time to
+      swim into uneaten water (dense shoals) or to close the distance on a
+      fish that keeps swimming (sparse ones), whichever is longer.
+
+    Whenever the budget frees up, shoal fish swim back in as individuals
+    (with a newborn's invulnerability, so they flash into view). Cost
+    depends on the number of regions and predators, never on the head count.
+    """
+    def __init__(self, budget, width, timers, seed=None, cell=200, speed=2):
+        self.budget = budget
+        self.width = width    # Tank width
+        self.timers = timers
+        self.rng = random.Random(seed)
+        self.cell = cell
+        self.speed = speed
+        # Regions tile the area fish swim in (50..width-50, 50..650)
+        self.cols = max(1, math.ceil((width - 100) / cell))
+        self.rows = max(1, math.ceil(600 / cell))
+        self.counts = [0] * (self.cols * self.rows)    # Catchable fish per region
+        # Newborns still invulnerable: {region: count} per tick, oldest first
+        self.hatching = []
+        self.batch = None    # This tick's batch, while it's being born
+        self.born_at = None
+        self.total = 0
+
+    def region_of(self, x, y):
+        col = min(self.cols - 1, max(0, int((x - 50) // self.cell)))
+        row = min(self.rows - 1, max(0, int((y - 50) // self.cell)))
+        return row * self.cols + col
+
+    def region_rect(self, region):
+        """(left, top, width, height) of a region, clipped to the swim area"""
+        row, col = divmod(region, self.cols)
+        left = 50 + col * self.cell
+        top = 50 + row * self.cell
+        return left, top, min(self.cell, self.width - 50 - left), min(self.cell, 650 - top)
+
+    def add(self, x, y):
+        """Fold one newborn feeder into the shoal at (x, y)"""
+        if self.born_at != self.timers.now:
+            self.born_at = self.timers.now
+            self.batch = {}
+            self.hatching.append(self.batch)
+            self.timers.after(300, self.mature)    # 5 seconds at 60 FPS before targetable
+        region = self.region_of(x, y)
+        self.batch[region] = self.batch.get(region, 0) + 1
+        self.total += 1
+
+    def mature(self):
+        """The oldest batch of newborns can be caught from now on"""
+        for region, count in self.hatching.pop(0).items():
+            self.counts[region] += count
+
+    def update(self, world, ticks):
+        """Advance the shoals by `ticks` ticks"""
+        if self.total:
+            self.hunt(world, ticks)
+            self.mix(ticks)
+        self.release(world)
+
+    def hunt(self, world, ticks):
+        """Idle predators eat from the shoal of the region they're in"""
+        counts = self.counts
+        for predator in world.predator_fish_list:
+            if predator.target is not None:
+                continue    # Busy with an individual
+            region = self.region_of(predator.x, predator.y)
+            if not counts[region]:
+                continue
+            left, top, width, height = self.region_rect(region)
+            density = counts[region] / (width * height)
+            # Distance to the 3rd closest feeder (or the edge of its range)
+            reach = min(400, math.sqrt(3 / (math.pi * density)))
+            # Ticks per catch, after turning towards the target. In a thick
+            # shoal the predator has eaten the fish right around it, so it
+            # has to swim on into water it hasn't cleared: a catch per area
+            # swept by its jaws (2 * size wide). In a thin one the chase is
+            # the slow part: its target keeps swimming, so it only gains its
+            # speed minus the feeder's each tick.
+            sweep = 1 / (density * 2 * predator.size * predator.speed)
+            gap = max(0, reach - predator.size)
+            closing = predator.speed - self.speed
+            if gap and closing <= 0:
+                continue    # Never catches up
+            pursuit = gap / closing if gap else 0
+            chase = SHOAL_TURN_LAG + max(sweep, pursuit)
+            expected = ticks / chase
+            caught = min(counts[region], stochastic_round(expected, self.rng))
+            counts[region] -= caught
+            self.total -= caught
+            world.population["feeders"] -= caught
+
+    def mix(self, ticks):
+        """Feeders wander into neighbouring regions"""
+        cols, rows = self.cols, self.rows
+        share = min(0.25, ticks * self.speed / self.cell / 4)    # To each neighbour
+        moves = []
+        for region, count in enumerate(self.counts):
+            if not count:
+                continue
+            row, col = divmod(region, cols)
+            # A side with no neighbour is a wall; those fish bounce back
+            for ok, other in ((col > 0, region - 1), (col < cols - 1, region + 1),
+                              (row > 0, region - cols), (row < rows - 1, region + cols)):
+                if ok:
+                    moves.append((region, other, stochastic_round(count * share, self.rng)))
+        counts = self.counts
+        for source, other, moved in moves:
+            moved = min(moved, counts[source])
+            counts[source] -= moved
+            counts[other] += moved
+
+    def release(self, world):
+        """Turn shoal fish back into individuals while the budget has room"""
+        room = self.budget - (world.population["feeders"] - self.total)
+        counts = self.counts
+        while room > 0 and any(counts):
+            # From the fullest region first
+            region = max(range(len(counts)), key=counts.__getitem__)
+            room -= self.release_from(world, counts, region, room)
+        # Newborns can go too (they come back with an individual's
+        # invulnerability), oldest first
+        for batch in self.hatching:
+            for region in list(batch):
+                if room <= 0:
+                    return
+                room -= self.release_from(world, batch, region, room)
+                if not batch[region]:
+                    del batch[region]
+
+    def release_from(self, world, counts, region, room):
+        """Release up to `room` fish from counts[region]; returns how many"""
+        left, top, width, height = self.region_rect(region)
+        released = min(room, counts[region])
+        for _ in range(released):
+            world.add_feeder(left + self.rng.uniform(0, width),
+                             top + self.rng.uniform(0, height))
+        counts[region] -= released
+        self.total -= released
+        return released
+
+    def draw(self, screen, tick):
+        """A few dim specks drifting in each region with fish, not one per fish"""
+        counts = list(self.counts)
+        for batch in self.hatching:
+            for region, count in batch.items():
+                counts[region] += count
+        for region, count in enumerate(counts):
+            if not count:
+                continue
+            left, top, width, height = self.region_rect(region)
+            cx, cy = left + width / 2, top + height / 2
+            for i in range(min(count, 6)):
+                x = cx + math.sin(tick * 0.01 + i * 2.1) * width * 0.35
+                y = cy + math.cos(tick * 0.013 + i * 1.7) * height * 0.3
+                pygame.draw.circle(screen, (120, 40, 40), (int(x), int(y)), 2)
+
+
 # Predator Fish
 
 
 class PredatorFish:
-    def __init__(self, x, y):
+    __slots__ = ("x", "y", "prev_x", "prev_y", "color", "size", "speed",
+                 "angle", "target")
+
+    def __init__(self, x, y, rng=random, size=25, speed=2.5):
         self.x = x
         self.y = y
+        self.prev_x = x
+        self.prev_y = y
         self.color = (30, 30, 30)    # Dark gray/black
-        self.size = 25    # Larger than other fish
-        self.speed = 2.5    # Slower than feeder fish initially
-        self.angle = random.uniform(0, 2 * math.pi)
+        self.size = size    # Larger than other fish
+        self.speed = speed    # Slower than feeder fish initially
+        self.angle = rng.uniform(0, 2 * math.pi)
         self.target = None    # Current feeder fish target
 
-    def find_target(self, feeder_list, other_predators):
+    def find_target(self, world):
         """Find 3rd closest targetable feeder fish that isn't already being chased"""
-        if self.target and self.target in feeder_list:
+        if self.target and self.target.alive:
             # Keep current target if still valid
             return
 
-        # Get list of fish already being chased by other predators
-        claimed_targets = [
-            pred.target for pred in other_predators if pred != self and pred.target]
-
-        # Find all unclaimed, targetable feeders with their distances
-        candidates = []
-        for feeder in feeder_list:
-            if feeder.is_targetable() and feeder not in claimed_targets:
-                dist = math.sqrt((self.x - feeder.x)**2 +
-                                 (self.y - feeder.y)**2)
-                if dist < 400:  # Within detection range
-                    candidates.append((dist, feeder))
-
-        # Sort by distance (closest first)
-        candidates.sort(key=lambda x: x[0])
+        # The 3 closest unclaimed feeders within detection range (the grid
+        # only holds targetable feeders nobody is chasing)
+        candidates = world.feeder_grid.nearest_k(self.x, self.y, 3, 400)
 
         # Target the 3rd closest (index 2), or farthest if fewer than 3
-        if len(candidates) >= 3:
-            self.target = candidates[2][1]  # 3rd closest
-        elif len(candidates) > 0:
-            self.target = candidates[-1][1]  # Farthest available
-        else:
-            self.target = None
+        if candidates:
+            world.set_target(self, candidates[-1])
 
-    def update(self, feeder_list, other_predators):
+    def update(self, world):
         """Update predator movement"""
-        self.find_target(feeder_list, other_predators)
+        rng = world.sim_rng
+        self.find_target(world)
 
         if self.target:
             # Chase target
@@ -2084,7 +2843,7 @@ class PredatorFish:
                 return self.target    # Return caught fish to remove it
         else:
             # Wander when no target
-            self.angle += random.uniform(-0.05, 0.05)
+            self.angle += rng.uniform(-0.05, 0.05)
 
         # Move
         self.x += math.cos(self.angle) * self.speed
@@ -2092,21 +2851,21 @@ class PredatorFish:
 
         # Bounce off boundaries
         if self.x < 50:
-            self.angle = random.uniform(-0.5, 0.5)
+            self.angle = rng.uniform(-0.5, 0.5)
             self.x = 50
-        elif self.x > WIDTH - 50:
-            self.angle = random.uniform(2.6, 3.6)
-            self.x = WIDTH - 50
+        elif self.x > world.width - 50:
+            self.angle = rng.uniform(2.6, 3.6)
+            self.x = world.width - 50
         if self.y < 50:
-            self.angle = random.uniform(-0.5, 0.5)
+            self.angle = rng.uniform(-0.5, 0.5)
             self.y = 50
         elif self.y > 650:
-            self.angle = random.uniform(2.6, 3.6)
+            self.angle = rng.uniform(2.6, 3.6)
             self.y = 650
 
         return None    # No catch
 
-    def draw(self, screen):
+    def draw(self, screen, fish_style):
         """Draw predator fish based on current style"""
         if fish_style == 0:
             self.draw_realistic(screen)
@@ -2365,14 +3124,13 @@ class PredatorFish:
         pygame.draw.polygon(screen, base_green, body_points)
         
         # Heavy camo pattern
-        random.seed(int(self.x * 50 + self.y))
+        camo_rng = random.Random(int(self.x * 50 + self.y))
         for _ in range(12):
-            spot_offset_x = random.uniform(-0.7, 0.5) * body_length
-            spot_offset_y = random.uniform(-0.4, 0.4) * body_height
+            spot_offset_x = camo_rng.uniform(-0.7, 0.5) * body_length
+            spot_offset_y = camo_rng.uniform(-0.4, 0.4) * body_height
             spot_x = cx + spot_offset_x * math.cos(self.angle) - spot_offset_y * math.sin(self.angle)
             spot_y = cy + spot_offset_x * math.sin(self.angle) + spot_offset_y * math.cos(self.angle)
-            pygame.draw.circle(screen, random.choice(camo_colors), (int(spot_x), int(spot_y)), random.randint(4, 9))
-        random.seed()
+            pygame.draw.circle(screen, camo_rng.choice(camo_colors), (int(spot_x), int(spot_y)), camo_rng.randint(4, 9))
         
         # Cannon barrel (main gun)
         barrel_start_x = cx + math.cos(self.angle) * self.size * 0.3
@@ -2671,90 +3429,29 @@ class PredatorFish:
             pygame.draw.circle(screen, navy_white, (int(win_x), int(win_y)), 2)
 
 
-# Create breeder fish - 6 of each color in breeding pairs
-fish_list = []
-
-# Blue breeders (3 pairs)
-blue_fish = [
-    Fish(200, 150, (50, 200, 255), size=15, speed=2),
-    Fish(250, 180, (50, 200, 255), size=15, speed=2),
-    Fish(400, 200, (50, 200, 255), size=15, speed=2),
-    Fish(450, 230, (50, 200, 255), size=15, speed=2),
-    Fish(600, 250, (50, 200, 255), size=15, speed=2),
-    Fish(650, 280, (50, 200, 255), size=15, speed=2),
-]
-# Pair them: 0-1, 2-3, 4-5
-blue_fish[0].breed_partner = blue_fish[1]
-blue_fish[1].breed_partner = blue_fish[0]
-blue_fish[2].breed_partner = blue_fish[3]
-blue_fish[3].breed_partner = blue_fish[2]
-blue_fish[4].breed_partner = blue_fish[5]
-blue_fish[5].breed_partner = blue_fish[4]
-fish_list.extend(blue_fish)
-
-# Yellow herbivore breeders (3 pairs)
-yellow_fish = [
-    Fish(200, 350, (255, 255, 100), size=18, speed=3),
-    Fish(250, 380, (255, 255, 100), size=18, speed=3),
-    Fish(400, 400, (255, 255, 100), size=18, speed=3),
-    Fish(450, 430, (255, 255, 100), size=18, speed=3),
-    Fish(600, 450, (255, 255, 100), size=18, speed=3),
-    Fish(650, 480, (255, 255, 100), size=18, speed=3),
-]
-for fish in yellow_fish:
-    fish.is_herbivore = True
-yellow_fish[0].breed_partner = yellow_fish[1]
-yellow_fish[1].breed_partner = yellow_fish[0]
-yellow_fish[2].breed_partner = yellow_fish[3]
-yellow_fish[3].breed_partner = yellow_fish[2]
-yellow_fish[4].breed_partner = yellow_fish[5]
-yellow_fish[5].breed_partner = yellow_fish[4]
-fish_list.extend(yellow_fish)
-
-# Orange breeders (3 pairs)
-orange_fish = [
-    Fish(200, 550, (255, 150, 50), size=20, speed=2.5),
-    Fish(250, 580, (255, 150, 50), size=20, speed=2.5),
-    Fish(400, 600, (255, 150, 50), size=20, speed=2.5),
-    Fish(450, 550, (255, 150, 50), size=20, speed=2.5),
-    Fish(600, 580, (255, 150, 50), size=20, speed=2.5),
-    Fish(650, 600, (255, 150, 50), size=20, speed=2.5),
-]
-orange_fish[0].breed_partner = orange_fish[1]
-orange_fish[1].breed_partner = orange_fish[0]
-orange_fish[2].breed_partner = orange_fish[3]
-orange_fish[3].breed_partner = orange_fish[2]
-orange_fish[4].breed_partner = orange_fish[5]
-orange_fish[5].breed_partner = orange_fish[4]
-fish_list.extend(orange_fish)
-
-# Initialize feeder and predator lists
-feeder_fish_list = []
-predator_fish_list = []
-
-# Start with 2 predator fish
-predator_fish_list.append(PredatorFish(600, 300))
-predator_fish_list.append(PredatorFish(400, 400))
-predator_fish_list.append(PredatorFish(800, 500))
-predator_fish_list.append(PredatorFish(300, 550))
-
 # Algae System
 
 
 class AlgaePatch:
-    def __init__(self, x, y):
+    __slots__ = ("x", "y", "size", "max_size", "color", "alive", "grown_tick")
+
+    def __init__(self, x, y, tick=0):
         self.x = x
         self.y = y
         self.size = 5    # Start small
         self.max_size = 25
         self.color = (34, 139, 34)    # Forest green
+        self.alive = True
+        self.grown_tick = tick    # Tick it last grew (or appeared)
 
-    def grow(self, nitrate_level):
-        """Algae grows faster with high nitrates"""
+    def grow(self, nitrate_level, tick):
+        """Algae grows faster with high nitrates (for every tick since it last grew)"""
+        ticks = tick - self.grown_tick
+        self.grown_tick = tick
         if nitrate_level > 30 and self.size < self.max_size:
             # Faster growth with more nitrates
             growth = 0.05 + (nitrate_level / 1000)
-            self.size += growth
+            self.size = min(self.max_size, self.size + growth * ticks)
 
     def shrink(self, amount):
         """Algae shrinks when eaten"""
@@ -2763,14 +3460,14 @@ class AlgaePatch:
     def is_dead(self):
         return self.size <= 0
 
-    def draw(self, screen):
+    def draw(self, screen, rng=random):
         """Draw algae patch"""
         pygame.draw.circle(screen, self.color, (int(
             self.x), int(self.y)), int(self.size))
         # Add some texture
         for i in range(3):
-            offset_x = random.randint(-int(self.size//2), int(self.size//2))
-            offset_y = random.randint(-int(self.size//2), int(self.size//2))
+            offset_x = rng.randint(-int(self.size//2), int(self.size//2))
+            offset_y = rng.randint(-int(self.size//2), int(self.size//2))
             pygame.draw.circle(screen, (44, 19, 44),
                                (int(self.x + offset_x), int(self.y + offset_y)),
                                max(1, int(self.size//4)))
@@ -2779,59 +3476,69 @@ class AlgaePatch:
 
 
 class Coral:
-    def __init__(self, x, y, coral_type, color):
+    __slots__ = ("x", "y", "coral_type", "base_color", "color", "size",
+                 "max_size", "growth_rate", "pulse_offset", "sway_offset",
+                 "age", "grown_tick", "branches", "tubes", "polyps")
+
+    def __init__(self, x, y, coral_type, color, rng=random):
         self.x = x
         self.y = y
         self.coral_type = coral_type  # "branch", "brain", "plate", "tube", "fan"
         self.base_color = color
         self.color = color
         self.size = 10  # Start small
-        self.max_size = random.randint(35, 65)
+        self.max_size = rng.randint(35, 65)
         self.growth_rate = 0.01  # Slow growth
-        self.pulse_offset = random.uniform(0, 2 * math.pi)  # For animation
-        self.sway_offset = random.uniform(0, 2 * math.pi)
+        self.pulse_offset = rng.uniform(0, 2 * math.pi)  # For animation
+        self.sway_offset = rng.uniform(0, 2 * math.pi)
         self.age = 0
+        self.grown_tick = 0    # Tick it last grew
         
         # Generate random branch structure for branch coral
-        self.branches = []
+        # (angle, length, thickness, sub-branch angles) per branch
+        branches = []
         if coral_type == "branch":
-            num_branches = random.randint(4, 7)
+            num_branches = rng.randint(4, 7)
             for i in range(num_branches):
-                angle = random.uniform(-0.8, 0.8)  # Spread angle
-                length = random.uniform(0.6, 1.0)  # Relative length
-                thickness = random.uniform(0.3, 0.6)
-                sub_branches = random.randint(1, 3)
-                self.branches.append({
-                    'angle': angle,
-                    'length': length,
-                    'thickness': thickness,
-                    'sub_branches': sub_branches,
-                    'sub_angles': [random.uniform(-0.5, 0.5) for _ in range(sub_branches)]
-                })
-        
-        # Generate tube positions for tube coral
-        self.tubes = []
+                angle = rng.uniform(-0.8, 0.8)  # Spread angle
+                length = rng.uniform(0.6, 1.0)  # Relative length
+                thickness = rng.uniform(0.3, 0.6)
+                sub_branches = rng.randint(1, 3)
+                sub_angles = tuple(rng.uniform(-0.5, 0.5) for _ in range(sub_branches))
+                branches.append((angle, length, thickness, sub_angles))
+        self.branches = tuple(branches)
+        
+        # Generate tube positions for tube coral: (x, y, height) per tube,
+        # back to front so they're drawn in order
+        tubes = []
         if coral_type == "tube":
-            num_tubes = random.randint(5, 10)
+            num_tubes = rng.randint(5, 10)
             for i in range(num_tubes):
-                offset_x = random.uniform(-0.8, 0.8)
-                offset_y = random.uniform(-0.3, 0.3)
-                height = random.uniform(0.5, 1.0)
-                self.tubes.append({'x': offset_x, 'y': offset_y, 'height': height})
-        
-        # Generate polyp positions
-        self.polyps = []
-        num_polyps = random.randint(8, 15)
+                offset_x = rng.uniform(-0.8, 0.8)
+                offset_y = rng.uniform(-0.3, 0.3)
+                height = rng.uniform(0.5, 1.0)
+                tubes.append((offset_x, offset_y, height))
+        self.tubes = tuple(sorted(tubes, key=lambda tube: tube[1], reverse=True))
+        
+        # Generate polyp positions: (angle, dist, phase) per polyp
+        polyps = []
+        num_polyps = rng.randint(8, 15)
         for i in range(num_polyps):
-            angle = random.uniform(0, 2 * math.pi)
-            dist = random.uniform(0.3, 0.9)
-            self.polyps.append({'angle': angle, 'dist': dist, 'phase': random.uniform(0, 2 * math.pi)})
+            angle = rng.uniform(0, 2 * math.pi)
+            dist = rng.uniform(0.3, 0.9)
+            polyps.append((angle, dist, rng.uniform(0, 2 * math.pi)))
+        self.polyps = tuple(polyps)
 
     def update(self):
-        """Grow coral slowly over time"""
+        """Advance the animation clock"""
         self.age += 1
+
+    def grow(self, tick):
+        """Grow coral slowly over time (for every tick since it last grew)"""
+        ticks = tick - self.grown_tick
+        self.grown_tick = tick
         if self.size < self.max_size:
-            self.size += self.growth_rate
+            self.size = min(self.max_size, self.size + self.growth_rate * ticks)
         
         # Gentle color pulsing for bioluminescence effect
         pulse = math.sin(self.age * 0.03 + self.pulse_offset) * 0.15
@@ -2872,23 +3579,23 @@ class Coral:
         ])
         
         # Draw each branch
-        for branch in self.branches:
-            branch_sway = sway * branch['length']
+        for branch_angle, branch_length, branch_thickness, sub_angles in self.branches:
+            branch_sway = sway * branch_length
             
             # Main branch
             start_x = self.x
             start_y = self.y - self.size * 0.2
-            end_x = self.x + math.sin(branch['angle']) * self.size * branch['length'] + branch_sway
-            end_y = self.y - self.size * branch['length']
+            end_x = self.x + math.sin(branch_angle) * self.size * branch_length + branch_sway
+            end_y = self.y - self.size * branch_length
             
-            thickness = max(2, int(self.size * branch['thickness'] * 0.15))
+            thickness = max(2, int(self.size * branch_thickness * 0.15))
             pygame.draw.line(screen, self.color, (start_x, start_y), (end_x, end_y), thickness)
             
             # Sub-branches
-            for i, sub_angle in enumerate(branch['sub_angles']):
+            for i, sub_angle in enumerate(sub_angles):
                 sub_start_x = start_x + (end_x - start_x) * (0.4 + i * 0.25)
                 sub_start_y = start_y + (end_y - start_y) * (0.4 + i * 0.25)
-                sub_end_x = sub_start_x + math.sin(branch['angle'] + sub_angle) * self.size * 0.4 + branch_sway * 0.5
+                sub_end_x = sub_start_x + math.sin(branch_angle + sub_angle) * self.size * 0.4 + branch_sway * 0.5
                 sub_end_y = sub_start_y - self.size * 0.35
                 
                 pygame.draw.line(screen, self.color, (sub_start_x, sub_start_y), (sub_end_x, sub_end_y), max(1, thickness - 1))
@@ -3008,17 +3715,15 @@ class Coral:
         light_color = (min(255, self.color[0] + 60), min(255, self.color[1] + 60), min(255, self.color[2] + 60))
         inner_color = (max(0, self.color[0] - 80), max(0, self.color[1] - 80), max(0, self.color[2] - 80))
         
-        # Sort tubes by y position for proper layering
-        sorted_tubes = sorted(self.tubes, key=lambda t: t['y'], reverse=True)
-        
-        for tube in sorted_tubes:
-            tube_x = self.x + tube['x'] * self.size * 0.5
-            tube_base_y = self.y + tube['y'] * self.size * 0.3
-            tube_height = self.size * tube['height']
+        # Tubes are stored back to front for proper layering
+        for offset_x, offset_y, height in self.tubes:
+            tube_x = self.x + offset_x * self.size * 0.5
+            tube_base_y = self.y + offset_y * self.size * 0.3
+            tube_height = self.size * height
             tube_width = self.size * 0.18
             
             # Individual tube sway
-            tube_sway = sway * tube['height']
+            tube_sway = sway * height
             tube_top_x = tube_x + tube_sway
             tube_top_y = tube_base_y - tube_height
             
@@ -3045,7 +3750,7 @@ class Coral:
             num_tentacles = 6
             for t in range(num_tentacles):
                 tentacle_angle = (t / num_tentacles) * 2 * math.pi
-                wave = math.sin(self.age * 0.08 + tube['x'] * 5 + t) * 3
+                wave = math.sin(self.age * 0.08 + offset_x * 5 + t) * 3
                 tentacle_end_x = tube_top_x + math.cos(tentacle_angle) * opening_width * 0.8 + wave
                 tentacle_end_y = tube_top_y - opening_height - 3 + math.sin(tentacle_angle) * 2
                 pygame.draw.line(screen, light_color,
@@ -3114,14 +3819,14 @@ class Coral:
 
 
 class Kelp:
-    def __init__(self, x):
+    def __init__(self, x, rng=random):
         self.x = x
         self.base_y = 700  # Grows from sand
-        self.height = random.randint(375, 750)  # Varying heights
+        self.height = rng.randint(375, 750)  # Varying heights
         self.color = (20, 80, 40)  # Dark green
         self.segments = 12  # Number of segments for smooth curve
-        self.sway_offset = random.uniform(0, 2 * math.pi)  # Random phase
-        self.sway_speed = random.uniform(0.02, 0.04)  # How fast it sways
+        self.sway_offset = rng.uniform(0, 2 * math.pi)  # Random phase
+        self.sway_speed = rng.uniform(0.02, 0.04)  # How fast it sways
         self.age = 0
 
     def update(self):
@@ -3161,14 +3866,20 @@ class Kelp:
 
 
 class Bubble:
-    def __init__(self, x, y, size=None):
+    __slots__ = ("x", "y", "prev_x", "prev_y", "size", "speed", "wobble",
+                 "wobble_offset", "age", "alive")
+
+    def __init__(self, x, y, size=None, rng=random):
         self.x = x
         self.y = y
-        self.size = size if size else random.randint(2, 5)
-        self.speed = random.uniform(0.5, 1.5)
-        self.wobble = random.uniform(-0.3, 0.3)    # Horizontal wobble
-        self.wobble_offset = random.uniform(0, 2 * math.pi)
+        self.prev_x = x
+        self.prev_y = y
+        self.size = size if size else rng.randint(2, 5)
+        self.speed = rng.uniform(0.5, 1.5)
+        self.wobble = rng.uniform(-0.3, 0.3)    # Horizontal wobble
+        self.wobble_offset = rng.uniform(0, 2 * math.pi)
         self.age = 0
+        self.alive = True
 
     def update(self):
         """Bubbles rise and wobble"""
@@ -3203,8 +3914,9 @@ class TreasureChest:
         self.lid_open_amount = 0    # 0 = closed, 1 = fully open
         self.bubble_timer = 0
         
-        # Cycle timer system
-        self.cycle_timer = delay  # Starts at different offsets for staggered opening
+        # Cycle timer system (worked out from the tick, so nothing counts down)
+        self.delay = delay        # Starts at different offsets for staggered opening
+        self.cycle_timer = delay
         self.cycle_length = 900   # Full cycle: 15 seconds at 60 FPS
         
         # Colors
@@ -3212,12 +3924,10 @@ class TreasureChest:
         self.gold_color = (255, 215, 0)
         self.dark_brown = (70, 47, 23)
 
-    def update(self, bubble_list):
+    def update(self, bubble_list, rng, tick):
         """Animate lid based on cycle timer"""
-        # Increment cycle timer
-        self.cycle_timer += 1
-        if self.cycle_timer >= self.cycle_length:
-            self.cycle_timer = 0
+        # Where we are in the cycle
+        self.cycle_timer = (self.delay + tick) % self.cycle_length
 
         # Calculate lid position based on where we are in cycle
         # Open for first 5 seconds (300 frames), closed for rest
@@ -3237,11 +3947,11 @@ class TreasureChest:
             self.bubble_timer += 1
             if self.bubble_timer > 15:
                 self.bubble_timer = 0
-                bubble_x = self.x + self.width // 2 + random.randint(-5, 5)
+                bubble_x = self.x + self.width // 2 + rng.randint(-5, 5)
                 bubble_y = self.y - 5
-                bubble_list.append(Bubble(bubble_x, bubble_y))
+                bubble_list.append(Bubble(bubble_x, bubble_y, rng=rng))
 
-    def draw(self, screen):
+    def draw(self, screen, rng=random):
         """Draw treasure chest with animated lid"""
         # Base of chest
         base_rect = pygame.Rect(self.x, self.y, self.width, self.height)
@@ -3260,8 +3970,8 @@ class TreasureChest:
             pygame.draw.rect(screen, self.gold_color, gold_rect)
             # Gold coins
             for i in range(3):
-                coin_x = self.x + random.randint(8, self.width - 8)
-                coin_y = self.y + self.height - random.randint(5, gold_height)
+                coin_x = self.x + rng.randint(8, self.width - 8)
+                coin_y = self.y + self.height - rng.randint(5, gold_height)
                 pygame.draw.circle(screen, (255, 223, 0), (coin_x, coin_y), 3)
 
         # Lid
@@ -3289,8 +3999,8 @@ class TreasureChest:
 
 
 class PirateShip:
-    def __init__(self):
-        self.x = WIDTH // 2
+    def __init__(self, x=WIDTH // 2):
+        self.x = x
         self.y = 450  # Back to near bottom
         self.age = 0
         # Dark silhouette colors
@@ -3341,11 +4051,11 @@ class PirateShip:
 
 # Light rays from surface
 class LightRay:
-    def __init__(self, x):
+    def __init__(self, x, rng=random):
         self.x = x
-        self.width = random.randint(40, 80)
-        self.intensity_offset = random.uniform(0, 2 * math.pi)
-        self.sway_offset = random.uniform(0, 2 * math.pi)
+        self.width = rng.randint(40, 80)
+        self.intensity_offset = rng.uniform(0, 2 * math.pi)
+        self.sway_offset = rng.uniform(0, 2 * math.pi)
         self.age = 0
 
     def update(self):
@@ -3371,65 +4081,11 @@ class LightRay:
         points = [top_left, top_right, bottom_right, bottom_left]
 
         # Create surface with alpha
-        ray_surface = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
+        ray_surface = pygame.Surface(screen.get_size(), pygame.SRCALPHA)
         pygame.draw.polygon(ray_surface, ray_color, points)
         screen.blit(ray_surface, (0, 0))
 
 
-# Create corals on rocks
-coral_list = []
-coral_types = ["branch", "brain", "plate", "tube", "fan"]
-coral_colors = [
-    (255, 100, 150),  # Pink
-    (150, 100, 255),  # Purple
-    (100, 255, 150),  # Green
-    (255, 200, 100),  # Orange
-    (100, 200, 255),  # Light blue
-    (255, 150, 200),  # Light pink
-    (200, 100, 200),  # Magenta
-    (100, 255, 200),  # Cyan-green
-    (255, 255, 150),  # Yellow
-]
-
-# Place corals on top of each rock
-for rock in rocks:
-    num_corals = random.randint(3, 5)
-    for _ in range(num_corals):
-        x = rock.x + random.randint(20, rock.width - 20)
-        y = rock.y - random.randint(5, 15)  # Slightly above rock surface
-        coral_type = random.choice(coral_types)
-        color = random.choice(coral_colors)
-        coral_list.append(Coral(x, y, coral_type, color))
-
-# Create kelp in background
-kelp_list = []
-kelp_positions = [150, 300, 500, 750, 950, 1100]  # Spread across tank
-for x_pos in kelp_positions:
-    kelp_list.append(Kelp(x_pos))
-
-# Create treasure chests (on pirate ship deck) with staggered opening
-treasure_chests = []
-ship_deck_y = 450  # Top of ship hull
-chest_data = [
-    (WIDTH // 2 - 300, ship_deck_y - 30, 0),      # Left: opens immediately
-    (WIDTH // 2, ship_deck_y - 30, 300),          # Center: opens after 5 sec
-    (WIDTH // 2 + 300, ship_deck_y - 30, 600)     # Right: opens after 10 sec
-]
-for x, y, delay in chest_data:
-    treasure_chests.append(TreasureChest(x, y, delay))
-
-# Create pirate ship
-pirate_ship = PirateShip()
-
-# Create light rays
-light_rays = []
-ray_positions = [200, 500, 800, 1000]
-for x_pos in ray_positions:
-    light_rays.append(LightRay(x_pos))
-
-# Bubble list
-bubble_list = []
-
 # Water Chemistry System
 
 
@@ -3442,6 +4098,10 @@ class WaterChemistry:
         """Add nitrates from fish waste or decaying food"""
         self.nitrates = min(self.nitrates + amount, self.max_nitrates)
 
+    def update(self, ticks):
+        """Fish naturally produce waste over time (half a unit every 2 seconds)"""
+        self.add_waste(0.5 * ticks / 120)
+
     def water_change(self, percentage):
         """Reduce nitrates through water change"""
         self.nitrates *= (1 - percentage)
@@ -3467,23 +4127,30 @@ class WaterChemistry:
 
 
 class FoodParticle:
+    __slots__ = ("x", "y", "prev_x", "prev_y", "size", "age", "max_age",
+                 "eaten", "sinking_speed", "alive")
+
     def __init__(self, x, y):
         self.x = x
         self.y = y
+        self.prev_x = x
+        self.prev_y = y
         self.size = 4
         self.age = 0
         self.max_age = 600  # 10 seconds at 60 FPS
         self.eaten = False
         self.sinking_speed = 0.5
+        self.alive = True
 
     def update(self):
         """Food sinks slowly and ages"""
         self.age += 1
         self.y += self.sinking_speed
 
-    def is_expired(self):
-        """Food decays after max_age or reaches bottom"""
-        return self.age > self.max_age or self.y > 690
+    def lifetime(self):
+        """Ticks until the food decays (past max_age) or sinks to the bottom"""
+        ticks_to_bottom = int((690 - self.y) / self.sinking_speed) + 1
+        return max(1, min(self.max_age + 1 - self.age, ticks_to_bottom))
 
     def draw(self, screen):
         """Draw food as a flashing pellet"""
@@ -3497,22 +4164,1246 @@ class FoodParticle:
             screen, color, (int(self.x), int(self.y)), self.size)
 
 
-# Initialize systems
-water_chemistry = WaterChemistry()
-food_particles = []
-algae_patches = []
-algae_spawn_timer = 0
+# Timers
+
+
+class TimerQueue:
+    """Callbacks scheduled for a simulation tick, kept in a heap
+
+    Entities register "wake me at tick T" instead of counting down every
+    tick, so only timers that actually expire cost anything. Cooldowns that
+    are merely checked (breeding, invulnerability) just store the tick they
+    end at and compare it with `now`.
+    """
+    def __init__(self):
+        self.now = 0
+        self.queue = []    # (tick, order scheduled, callback, args)
+        self.scheduled = 0
+
+    def __len__(self):
+        return len(self.queue)
+
+    def schedule(self, tick, callback, *args):
+        """Run callback(*args) when the clock reaches tick"""
+        self.scheduled += 1
+        heapq.heappush(self.queue, (tick, self.scheduled, callback, args))
+
+    def after(self, ticks, callback, *args):
+        self.schedule(self.now + ticks, callback, *args)
+
+    def advance(self, tick):
+        """Move the clock to tick and run everything due by then, in order"""
+        self.now = tick
+        queue = self.queue
+        while queue and queue[0][0] <= tick:
+            _, _, callback, args = heapq.heappop(queue)
+            callback(*args)
+
+
+class RateScheduler:
+    """Update rates for subsystems that change slowly
+
+    Each subsystem declares how many times a second it updates. One that
+    works on many entities (coral, algae) gets a share of them every tick
+    instead of all of them every few ticks, and subsystems updated all at
+    once (chemistry) are offset from each other, so no tick takes all the
+    slow work at once.
+    """
+    def __init__(self, rates):
+        self.intervals = {}    # name: ticks between updates
+        self.offsets = {}      # name: which tick of the interval it runs on
+        for name, hz in rates.items():
+            interval = max(1, round(SIM_HZ / hz))
+            self.intervals[name] = interval
+            self.offsets[name] = len(self.offsets) % interval
+
+    def due(self, name, tick):
+        """Whether a whole-subsystem update runs this tick"""
+        return tick % self.intervals[name] == self.offsets[name]
+
+    def share(self, name, tick, entities):
+        """This tick's slice of entities; each is picked once per interval"""
+        interval = self.intervals[name]
+        return entities[(tick + self.offsets[name]) % interval::interval]
+
+
+# Spatial index
+
+
+class SpatialGrid:
+    """Uniform grid of buckets so 'what is near this point' skips far entities
+
+    Entities only need x and y. Buckets are keyed by (column, row), only
+    exist while they hold something, and store (x, y, entity) as it was when
+    inserted, so queries never touch entity attributes (cheap for
+    FeederSwarm's property-backed feeders). With only a handful of entities
+    a straight scan is cheaper than visiting cells, so queries fall back to it.
+    """
+    SCAN_LIMIT = 32
+
+    def __init__(self, cell_size=64):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def cell_of(self, x, y):
+        return (int(x // self.cell_size), int(y // self.cell_size))
+
+    def insert(self, entity):
+        x, y = entity.x, entity.y
+        key = self.cell_of(x, y)
+        bucket = self.cells.get(key)
+        if bucket is None:
+            self.cells[key] = [(x, y, entity)]
+        else:
+            bucket.append((x, y, entity))
+        self.count += 1
+
+    def remove(self, entity):
+        """Remove an entity that hasn't moved since it was inserted"""
+        key = self.cell_of(entity.x, entity.y)
+        bucket = self.cells[key]
+        for i, item in enumerate(bucket):
+            if item[2] is entity:
+                del bucket[i]
+                break
+        if not bucket:
+            del self.cells[key]
+        self.count -= 1
+
+    def rebuild(self, entities):
+        """Re-bucket everything from scratch (for entities that move every tick)"""
+        self.cells = {}
+        self.count = 0
+        for entity in entities:
+            self.insert(entity)
+
+    def nearby_buckets(self, x, y, radius):
+        """Buckets that could hold something within radius of (x, y)"""
+        if self.count <= self.SCAN_LIMIT:
+            return list(self.cells.values())
+        size = self.cell_size
+        cells = self.cells
+        buckets = []
+        for col in range(int((x - radius) // size), int((x + radius) // size) + 1):
+            for row in range(int((y - radius) // size), int((y + radius) // size) + 1):
+                bucket = cells.get((col, row))
+                if bucket:
+                    buckets.append(bucket)
+        return buckets
+
+    def query_radius(self, x, y, radius):
+        """Entities closer than radius to (x, y)"""
+        radius_sq = radius * radius
+        found = []
+        for bucket in self.nearby_buckets(x, y, radius):
+            for ex, ey, entity in bucket:
+                dx = ex - x
+                dy = ey - y
+                if dx * dx + dy * dy < radius_sq:
+                    found.append(entity)
+        return found
+
+    def nearest(self, x, y, max_dist, accept=None):
+        """Closest entity nearer than max_dist (optionally passing accept), or None
+
+        Searches square rings of cells outwards from (x, y) and stops once a
+        ring can't hold anything closer than the best match so far.
+        """
+        if self.count <= self.SCAN_LIMIT:
+            rings = [self.cells.values()]
+        else:
+            rings = self.bucket_rings(x, y, max_dist)
+        size = self.cell_size
+        best = None
+        best_dist_sq = max_dist * max_dist
+        for ring, buckets in enumerate(rings):
+            # Every cell in this ring is at least (ring - 1) cells away
+            if ring > 1 and ((ring - 1) * size) ** 2 >= best_dist_sq:
+                break
+            for bucket in buckets:
+                for ex, ey, entity in bucket:
+                    dx = ex - x
+                    dy = ey - y
+                    dist_sq = dx * dx + dy * dy
+                    if dist_sq < best_dist_sq and (accept is None or accept(entity)):
+                        best = entity
+                        best_dist_sq = dist_sq
+        return best
+
+    def nearest_k(self, x, y, k, max_dist, accept=None):
+        """Up to k entities nearer than max_dist (passing accept), closest first"""
+        if self.count <= self.SCAN_LIMIT:
+            rings = [self.cells.values()]
+        else:
+            rings = self.bucket_rings(x, y, max_dist)
+        size = self.cell_size
+        max_dist_sq = max_dist * max_dist
+        # Max-heap (by negated distance) of the k best so far; the counter
+        # keeps entities themselves from ever being compared
+        best = []
+        counter = 0
+        for ring, buckets in enumerate(rings):
+            if ring > 1 and len(best) == k and ((ring - 1) * size) ** 2 >= -best[0][0]:
+                break
+            for bucket in buckets:
+                for ex, ey, entity in bucket:
+                    dx = ex - x
+                    dy = ey - y
+                    dist_sq = dx * dx + dy * dy
+                    if dist_sq >= max_dist_sq:
+                        continue
+                    if len(best) == k and dist_sq >= -best[0][0]:
+                        continue
+                    if accept is not None and not accept(entity):
+                        continue
+                    counter += 1
+                    if len(best) == k:
+                        heapq.heapreplace(best, (-dist_sq, counter, entity))
+                    else:
+                        heapq.heappush(best, (-dist_sq, counter, entity))
+        best.sort(key=lambda item: (-item[0], item[1]))
+        return [entity for _, _, entity in best]
+
+    def bucket_rings(self, x, y, max_dist):
+        """Yield the non-empty buckets of each square ring of cells around (x, y)"""
+        cells = self.cells
+        col, row = self.cell_of(x, y)
+        for ring in range(int(max_dist // self.cell_size) + 2):
+            buckets = []
+            for dx, dy in ring_offsets(ring):
+                bucket = cells.get((col + dx, row + dy))
+                if bucket:
+                    buckets.append(bucket)
+            yield buckets
+
+
+_ring_offsets = {}
+
+
+def ring_offsets(ring):
+    """(dx, dy) of the cells on the square ring `ring` cells out (cached)"""
+    offsets = _ring_offsets.get(ring)
+    if offsets is None:
+        if ring == 0:
+            offsets = [(0, 0)]
+        else:
+            offsets = []
+            for dx in range(-ring, ring + 1):
+                offsets.append((dx, -ring))
+                offsets.append((dx, ring))
+            for dy in range(-ring + 1, ring):
+                offsets.append((-ring, dy))
+                offsets.append((ring, dy))
+        _ring_offsets[ring] = offsets
+    return offsets
+
+
+# Profiling
+
+
+class PhaseTimer:
+    """Context manager that adds its elapsed time to one profiler phase"""
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.start
+        profiler = self.profiler
+        current = profiler.current
+        current[self.name] = current.get(self.name, 0.0) + elapsed
+        if profiler.tracer is not None:
+            profiler.tracer.add(self.name, self.start, elapsed)
+        return False
+
+
+class TraceRecorder:
+    """Collects phase timings as Chrome Trace Events and writes them to a file"""
+    def __init__(self, path, frames):
+        self.path = path
+        self.frames_left = frames
+        self.frames = 0
+        self.events = []
+        self.origin = time.perf_counter()
+
+    def add(self, name, start, duration, category=None, args=None):
+        """Record one complete ("X") event; times are perf_counter seconds"""
+        if category is None:
+            # Entity batches are named Class.update / Class.draw
+            suffix = name.rsplit(".", 1)[-1]
+            category = suffix if suffix in ("update", "draw") else "loop"
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": round((start - self.origin) * 1e6, 3),
+            "dur": round(duration * 1e6, 3),
+            "pid": 1,
+            "tid": 1,
+        }
+        if args:
+            event["args"] = args
+        self.events.append(event)
+
+    def add_frame(self, start, duration):
+        self.add(f"frame {self.frames}", start, duration, "frame", {"ms": round(duration * 1000, 3)})
+        self.frames += 1
+        self.frames_left -= 1
+
+    def done(self):
+        return self.frames_left <= 0
+
+    def write(self):
+        """Write the trace; events are sorted so enclosing frames come first"""
+        metadata = [
+            {"name": "process_name", "ph": "M", "pid": 1, "tid": 1,
+             "args": {"name": "Coral Reef Aquarium"}},
+            {"name": "thread_name", "ph": "M", "pid": 1, "tid": 1,
+             "args": {"name": "main loop"}},
+        ]
+        events = sorted(self.events, key=lambda event: (event["ts"], -event["dur"]))
+        with open(self.path, "w") as f:
+            json.dump({"traceEvents": metadata + events, "displayTimeUnit": "ms"}, f)
+
+
+class FrameProfiler:
+    """Times named phases of every frame and keeps rolling averages"""
+    def __init__(self, history=120):
+        self.history = history
+        self.current = {}          # Seconds spent in each phase this frame
+        self.phase_history = {}    # Phase name -> ms per frame, most recent last
+        self.frame_history = collections.deque(maxlen=history)
+        self.frame_start = None
+        self.tracer = None         # Optional TraceRecorder fed with every phase
+
+    def phase(self, name):
+        """Time a block: `with profiler.phase("Coral.draw"): ...`"""
+        return PhaseTimer(self, name)
+
+    def begin_frame(self):
+        self.current = {}
+        self.frame_start = time.perf_counter()
+
+    def end_frame(self):
+        """Fold this frame's phase times into the rolling history"""
+        frame_time = time.perf_counter() - self.frame_start
+        frame_ms = frame_time * 1000
+        self.frame_history.append(frame_ms)
+        for name in self.current:
+            if name not in self.phase_history:
+                self.phase_history[name] = collections.deque(maxlen=self.history)
+        # Phases that didn't run this frame (e.g. no sim tick) count as 0 ms
+        for name, times in self.phase_history.items():
+            times.append(self.current.get(name, 0.0) * 1000)
+
+        if self.tracer is not None:
+            self.tracer.add_frame(self.frame_start, frame_time)
+            if self.tracer.done():
+                self.finish_trace()
+
+    def finish_trace(self):
+        """Write out and detach the trace recorder, if one is running"""
+        tracer = self.tracer
+        if tracer is None:
+            return
+        self.tracer = None
+        try:
+            tracer.write()
+            print(f"Trace of {tracer.frames} frames written to {tracer.path}")
+        except OSError as e:
+            print(f"ERROR: could not write trace: {e}")
+
+    def averages(self):
+        """(phase, average ms per frame) pairs, slowest first"""
+        averages = [(name, sum(times) / len(times))
+                    for name, times in self.phase_history.items() if times]
+        averages.sort(key=lambda pair: pair[1], reverse=True)
+        return averages
+
+    def average_frame_ms(self):
+        if not self.frame_history:
+            return 0.0
+        return sum(self.frame_history) / len(self.frame_history)
+
+
+class NullProfiler:
+    """Stand-in profiler that measures nothing (the default for a World)"""
+    def __init__(self):
+        self.null_phase = contextlib.nullcontext()
+
+    def phase(self, name):
+        return self.null_phase
+
+    def begin_frame(self):
+        pass
+
+    def end_frame(self):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
+
+
+class ProfileCapture:
+    """Runs cProfile over the next few frames, then saves a .pstats file"""
+    def __init__(self, path, frames):
+        self.path = path
+        self.frames_left = frames
+        self.frames = 0
+        self.profile = cProfile.Profile()
+        # False until start_frame; a capture started mid-frame (C key)
+        # doesn't count that frame
+        self.running = False
+
+    def start_frame(self):
+        self.profile.enable()
+        self.running = True
+
+    def end_frame(self):
+        """Stop timing this frame; returns True once every frame is captured"""
+        if not self.running:
+            return False
+        self.profile.disable()
+        self.running = False
+        self.frames += 1
+        self.frames_left -= 1
+        return self.frames_left <= 0
+
+    def finish(self, top=30):
+        """Dump the profile and print the slowest functions by cumulative time"""
+        print(f"\ncProfile capture of {self.frames} frames")
+        stats = pstats.Stats(self.profile)
+        stats.sort_stats("cumulative").print_stats(top)
+        try:
+            stats.dump_stats(self.path)
+            print(f"Profile written to {self.path} (open with: python -m pstats {self.path})")
+        except OSError as e:
+            print(f"ERROR: could not write profile: {e}")
+
+
+# Scenarios
+
+
+# The built-in tank. Scenario files (JSON) override any of these keys;
+# groups of fish take explicit "positions" and/or a random "count".
+DEFAULT_SCENARIO = {
+    "name": "Coral Reef",
+    "width": 1200,
+    "initial_nitrates": 0,
+    "fish_style": 0,
+    "background_scene": 0,
+    # "objects" (every fish updates itself) or "numpy" (feeders live in
+    # FeederSwarm arrays and fish steering runs as array kernels)
+    "backend": "objects",
+    # 6 of each color in breeding pairs (0-1, 2-3, 4-5)
+    "breeders": [
+        {"color": [50, 200, 255], "size": 15, "speed": 2, "herbivore": False,
+         "positions": [[200, 150], [250, 180], [400, 200], [450, 230], [600, 250], [650, 280]]},
+        {"color": [255, 255, 100], "size": 18, "speed": 3, "herbivore": True,
+         "positions": [[200, 350], [250, 380], [400, 400], [450, 430], [600, 450], [650, 480]]},
+        {"color": [255, 150, 50], "size": 20, "speed": 2.5, "herbivore": False,
+         "positions": [[200, 550], [250, 580], [400, 600], [450, 550], [600, 580], [650, 600]]},
+    ],
+    "feeders": {"count": 0, "size": 10, "speed": 2},
+    "predators": {"positions": [[600, 300], [400, 400], [800, 500], [300, 550]],
+                  "size": 25, "speed": 2.5},
+    "algae": {"count": 0},
+    # Most of each growing species the tank holds (null for no limit);
+    # breeding and algae spawning slow down as a population nears it
+    "carrying_capacity": {"feeders": 300, "algae": 100},
+    # Feeders swim in schools (boids) instead of each wandering alone
+    "schooling": False,
+    # Most feeders simulated one by one (null for all of them); the rest
+    # are kept as per-region head counts by FeederShoals
+    "feeder_budget": None,
+    "rocks": [[100, 675, 200, 75], [350, 650, 180, 100], [600, 685, 150, 65], [900, 670, 220, 90]],
+    "kelp": [150, 300, 500, 750, 950, 1100],
+    "light_rays": [200, 500, 800, 1000],
+}
+
+
+# Narrowest tank a scenario can ask for: fish keep 50px from the walls and
+# auto-feeding drops food at least 150px in from each side
+MIN_TANK_WIDTH = 400
+
+
+# Smallest rock (width, height) a scenario can place: cracks sit 10px and
+# corals 20px in from its edges
+MIN_ROCK_SIZE = (40, 20)
+
+
+def is_number(value):
+    """True for ints and floats (JSON true/false don't count)"""
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def is_whole(value, minimum=0):
+    """True for an int of at least minimum (JSON true/false don't count)"""
+    return isinstance(value, int) and not isinstance(value, bool) and value >= minimum
+
+
+def check_group(group, where, source):
+    """Raise ValueError unless a fish or algae group's positions and count are usable"""
+    if not isinstance(group, dict):
+        raise ValueError(f"{source}: {where} must be an object")
+    positions = group.get("positions", [])
+    if not isinstance(positions, list) or not all(
+            isinstance(pos, list) and len(pos) == 2 and all(is_number(v) for v in pos)
+            for pos in positions):
+        raise ValueError(f"{source}: {where} positions must be a list of [x, y] pairs")
+    if not is_whole(group.get("count", 0)):
+        raise ValueError(f"{source}: {where} count must be a whole number")
+
+
+def load_scenario(path):
+    """Read a JSON scenario file and fill in anything it leaves out from the default"""
+    with open(path) as f:
+        overrides = json.load(f)
+    return build_scenario(overrides, path)
+
+
+def build_scenario(overrides, source="scenario"):
+    """Apply scenario overrides on top of a copy of the default tank"""
+    scenario = copy.deepcopy(DEFAULT_SCENARIO)
+    for key, value in overrides.items():
+        if key not in scenario:
+            raise ValueError(f"{source}: unknown scenario key '{key}'")
+        # Species settings merge, so a file can change just a count or a speed
+        if isinstance(scenario[key], dict) and isinstance(value, dict):
+            scenario[key].update(value)
+        else:
+            scenario[key] = value
+
+    if not isinstance(scenario["name"], str):
+        raise ValueError(f"{source}: name must be a string")
+    if not is_whole(scenario["width"], MIN_TANK_WIDTH):
+        raise ValueError(f"{source}: width must be a whole number of at least {MIN_TANK_WIDTH}")
+    if not is_number(scenario["initial_nitrates"]) or scenario["initial_nitrates"] < 0:
+        raise ValueError(f"{source}: initial_nitrates must be a number of at least 0")
+    if not isinstance(scenario["breeders"], list):
+        raise ValueError(f"{source}: breeders must be a list of groups")
+    for i, group in enumerate(scenario["breeders"]):
+        check_group(group, f"breeders[{i}]", source)
+        color = group.get("color")
+        if not isinstance(color, list) or len(color) != 3 or not all(is_number(c) for c in color):
+            raise ValueError(f"{source}: breeders[{i}] needs a color of three numbers")
+        for field in ("size", "speed"):
+            if not is_number(group.get(field)) or group[field] <= 0:
+                raise ValueError(f"{source}: breeders[{i}] needs a positive number for {field}")
+        if not isinstance(group.get("herbivore", False), bool):
+            raise ValueError(f"{source}: breeders[{i}] herbivore must be true or false")
+    for species in ("feeders", "predators", "algae"):
+        check_group(scenario[species], species, source)
+    for species in ("feeders", "predators"):
+        for field in ("size", "speed"):
+            if not is_number(scenario[species].get(field)) or scenario[species][field] <= 0:
+                raise ValueError(f"{source}: {species} {field} must be a positive number")
+    if not is_whole(scenario["fish_style"]) or scenario["fish_style"] >= len(fish_style_names):
+        raise ValueError(f"{source}: fish_style must be 0-{len(fish_style_names) - 1}")
+    if (not is_whole(scenario["background_scene"])
+            or scenario["background_scene"] >= len(background_scene_names)):
+        raise ValueError(f"{source}: background_scene must be 0-{len(background_scene_names) - 1}")
+    rocks = scenario["rocks"]
+    min_width, min_height = MIN_ROCK_SIZE
+    if not isinstance(rocks, list) or not all(
+            isinstance(rock, list) and len(rock) == 4 and all(is_number(v) for v in rock)
+            and rock[2] >= min_width and rock[3] >= min_height for rock in rocks):
+        raise ValueError(f"{source}: rocks must be [x, y, width, height] lists, "
+                         f"at least {min_width}x{min_height}")
+    for key in ("kelp", "light_rays"):
+        if not isinstance(scenario[key], list) or not all(is_number(x) for x in scenario[key]):
+            raise ValueError(f"{source}: {key} must be a list of x positions")
+    if scenario["backend"] not in ("objects", "numpy"):
+        raise ValueError(f"{source}: backend must be 'objects' or 'numpy'")
+    if scenario["backend"] == "numpy" and np is None:
+        raise ValueError(f"{source}: backend 'numpy' needs NumPy installed (pip install numpy)")
+    if not isinstance(scenario["carrying_capacity"], dict):
+        raise ValueError(f"{source}: carrying_capacity must be an object")
+    for species, capacity in scenario["carrying_capacity"].items():
+        if species not in DEFAULT_SCENARIO["carrying_capacity"]:
+            raise ValueError(f"{source}: unknown carrying_capacity species '{species}'")
+        if capacity is not None and not is_whole(capacity):
+            raise ValueError(f"{source}: carrying_capacity for {species} must be a whole number or null")
+    if not isinstance(scenario["schooling"], bool):
+        raise ValueError(f"{source}: schooling must be true or false")
+    budget = scenario["feeder_budget"]
+    if budget is not None and not is_whole(budget):
+        raise ValueError(f"{source}: feeder_budget must be a whole number or null")
+    return scenario
+
+
+# The Tank
+
+
+def derive_seed(seed, stream):
+    """Seed for one named random stream (None keeps it unseeded)"""
+    if seed is None:
+        return None
+    return f"{seed}:{stream}"
+
+
+class World:
+    """One aquarium: owns every entity list, the water chemistry and the RNGs
+
+    Randomness comes from three separate streams so that a seeded run is
+    reproducible and drawing never perturbs the ecosystem:
+      sim_rng    - everything the simulation decides (fish, food, algae)
+      render_rng - cosmetic layout and per-frame visual jitter
+      scene_rng  - background scene effects (explosions, wakes)
+    """
+    def __init__(self, scenario=None, seed=None):
+        self.scenario = scenario if scenario is not None else DEFAULT_SCENARIO
+        self.seed = seed
+        self.sim_rng = random.Random(derive_seed(seed, "simulation"))
+        self.render_rng = random.Random(derive_seed(seed, "render"))
+        self.scene_rng = random.Random(derive_seed(seed, "scene"))
+        self.ticks = 0
+
+        # Phase timing hooks; a FrameProfiler can be swapped in to measure
+        self.profiler = NULL_PROFILER
+
+        # This tank's width, passed to every boundary check (tanks of
+        # different widths can share a process)
+        self.width = self.scenario["width"]
+
+        # Display settings that the simulation carries along
+        self.fish_style = self.scenario["fish_style"]
+        self.background_scene = self.scenario["background_scene"]
+
+        # Water chemistry, food and algae
+        self.water_chemistry = WaterChemistry()
+        self.water_chemistry.nitrates = self.scenario["initial_nitrates"]
+        self.food_particles = []
+        self.bubble_list = []
+
+        # Scheduled events (food decay, algae spawning); its clock is ticks
+        self.timers = TimerQueue()
+        self.timers.schedule(181, self.spawn_algae)    # Every 3 seconds
+        self.algae_scheduled = True    # False while nitrates are too low to spawn
+
+        # Spatial indexes for fish looking for something to eat. Food sinks
+        # every tick so its grid is rebuilt; algae never move so their grid
+        # is kept up to date as patches appear and die.
+        self.food_grid = SpatialGrid()
+        self.algae_grid = SpatialGrid()
+
+        # Optional NumPy backend: feeders as arrays instead of one object
+        # each, and breeders steered together by steer_breeders()
+        self.vectorized = self.scenario["backend"] == "numpy"
+        self.feeder_swarm = None
+        self.steering_rng = None
+        if self.vectorized:
+            self.feeder_swarm = FeederSwarm(self.timers, derive_seed(seed, "feeders"))
+            self.steering_rng = numpy_rng(derive_seed(seed, "steering"))
+
+        # Targetable feeders nobody is chasing yet, re-indexed after they
+        # move, for predators looking for a target
+        if self.feeder_swarm:
+            self.feeder_grid = SwarmGrid(self.feeder_swarm)
+        else:
+            self.feeder_grid = SpatialGrid()
+
+        # Which predator is chasing each feeder; kept in step with every
+        # predator's target so claim checks don't have to scan predators
+        self.chasers = {}
+
+        # Slow subsystems update at their own rate (Hz); fish and everything
+        # else that moves update every tick
+        self.rates = RateScheduler(SUBSYSTEM_RATES)
+
+        # Speed factor from water quality, worked out with the chemistry
+        self.fish_health = self.water_chemistry.affects_fish_health()
+
+        # Head count per species, kept up to date as fish and algae are
+        # spawned (counted when queued) and die, so nothing is ever recounted
+        self.population = collections.Counter()
+        self.carrying_capacity = self.scenario["carrying_capacity"]
+
+        self.schooling = self.scenario["schooling"]
+
+        # Feeders past the budget swim as shoals rather than individuals
+        self.shoals = None
+        if self.scenario["feeder_budget"] is not None:
+            self.shoals = FeederShoals(self.scenario["feeder_budget"], self.width,
+                                       self.timers, derive_seed(seed, "shoals"),
+                                       speed=self.scenario["feeders"]["speed"])
+
+        # Command buffer for the tick: spawns wait in these lists and kills
+        # set has_dead, and apply_commands() applies both once updates are
+        # done, so no update loop ever sees the list it walks change
+        self.new_food = []
+        self.new_algae = []
+        self.new_bubbles = []
+        self.new_feeders = []
+        self.has_dead = False
+
+        # Background scenes, indexed by background_scene (0 = none)
+        self.background_scenes = [
+            None,
+            BackgroundWhale(self.width),
+            BackgroundTank(self.scene_rng, self.width),
+            BackgroundJet(self.scene_rng, self.width),
+            BackgroundBattleship(self.scene_rng, self.width),
+            BackgroundShuttle(self.scene_rng, self.width),
+        ]
+
+        self.build_rocks()
+        self.build_sand()
+        self.build_fish()
+        self.build_scenery()
+        self.apply_commands()
 
-# Font for UI
-pygame.font.init()
-font = pygame.font.SysFont('Arial', 20)
-small_font = pygame.font.SysFont('Arial', 16)
+    def build_rocks(self):
+        """Rock structures - each rock is (x, y, width, height)"""
+        self.rocks = [pygame.Rect(*rock) for rock in self.scenario["rocks"]]
 
+        # Generate rock details ONCE (so they don't flicker)
+        self.rock_details = []
+        for rock in self.rocks:
+            cracks = []
+            for i in range(3):
+                start_x = rock.x + self.render_rng.randint(10, rock.width - 10)
+                start_y = rock.y + self.render_rng.randint(10, rock.height - 10)
+                end_x = start_x + self.render_rng.randint(-30, 30)
+                end_y = start_y + self.render_rng.randint(20, 50)
+                cracks.append(((start_x, start_y), (end_x, end_y)))
+            self.rock_details.append(cracks)
+
+    def build_sand(self):
+        """Generate sand grain positions ONCE"""
+        self.sand_grains = []
+        for _ in range(100):
+            x = self.render_rng.randint(0, self.width)
+            y = self.render_rng.randint(700, HEIGHT)
+            grain_color = (
+                SAND_COLOR[0] + self.render_rng.randint(-20, 20),
+                SAND_COLOR[1] + self.render_rng.randint(-20, 20),
+                SAND_COLOR[2] + self.render_rng.randint(-20, 20)
+            )
+            self.sand_grains.append((x, y, grain_color))
+
+    def build_fish(self):
+        """Create breeder pairs, feeders and predators from the scenario"""
+        rng = self.sim_rng
+
+        # Breeders come in groups; consecutive fish in a group are partners
+        self.fish_list = []
+        for group in self.scenario["breeders"]:
+            breeders = []
+            for x, y in self.scenario_positions(group):
+                fish = Fish(x, y, tuple(group["color"]), size=group["size"],
+                            speed=group["speed"], rng=rng)
+                fish.is_herbivore = group.get("herbivore", False)
+                breeders.append(fish)
+            self.pair_breeders(breeders)
+
+        # Feeder and predator fish
+        self.feeder_params = self.scenario["feeders"]
+        # With the NumPy backend this is the swarm's own list of row proxies
+        self.feeder_fish_list = self.feeder_swarm.feeders if self.feeder_swarm else []
+        for x, y in self.scenario_positions(self.feeder_params):
+            self.spawn_feeder(x, y)
+
+        predators = self.scenario["predators"]
+        self.predator_fish_list = [
+            PredatorFish(x, y, rng, size=predators["size"], speed=predators["speed"])
+            for x, y in self.scenario_positions(predators)
+        ]
+        self.population["breeders"] = len(self.fish_list)
+        self.population["predators"] = len(self.predator_fish_list)
+
+        # Starting algae
+        self.algae_patches = []
+        for x, y in self.scenario_positions(self.scenario["algae"], margin=100):
+            self.add_algae(AlgaePatch(x, y))
+
+    def scenario_positions(self, group, margin=50):
+        """Explicit positions from a scenario group plus `count` random ones"""
+        positions = [tuple(pos) for pos in group.get("positions", [])]
+        for _ in range(group.get("count", 0)):
+            positions.append((self.sim_rng.uniform(margin, self.width - margin),
+                              self.sim_rng.uniform(margin, 650)))
+        return positions
+
+    def pair_breeders(self, breeders):
+        """Pair them: 0-1, 2-3, 4-5 and add them to the tank"""
+        for i in range(0, len(breeders) - 1, 2):
+            breeders[i].breed_partner = breeders[i + 1]
+            breeders[i + 1].breed_partner = breeders[i]
+        self.fish_list.extend(breeders)
+
+    def build_scenery(self):
+        """Corals, kelp, treasure chests, pirate ship and light rays"""
+        # Create corals on rocks
+        self.coral_list = []
+        coral_types = ["branch", "brain", "plate", "tube", "fan"]
+        coral_colors = [
+            (255, 100, 150),  # Pink
+            (150, 100, 255),  # Purple
+            (100, 255, 150),  # Green
+            (255, 200, 100),  # Orange
+            (100, 200, 255),  # Light blue
+            (255, 150, 200),  # Light pink
+            (200, 100, 200),  # Magenta
+            (100, 255, 200),  # Cyan-green
+            (255, 255, 150),  # Yellow
+        ]
 
-def draw_ui():
+        # Place corals on top of each rock
+        for rock in self.rocks:
+            num_corals = self.render_rng.randint(3, 5)
+            for _ in range(num_corals):
+                x = rock.x + self.render_rng.randint(20, rock.width - 20)
+                y = rock.y - self.render_rng.randint(5, 15)  # Slightly above rock surface
+                coral_type = self.render_rng.choice(coral_types)
+                color = self.render_rng.choice(coral_colors)
+                self.coral_list.append(Coral(x, y, coral_type, color, self.render_rng))
+
+        # Create kelp in background
+        self.kelp_list = []
+        for x_pos in self.scenario["kelp"]:
+            self.kelp_list.append(Kelp(x_pos, self.render_rng))
+
+        # Create treasure chests (on pirate ship deck) with staggered opening
+        self.treasure_chests = []
+        ship_deck_y = 450  # Top of ship hull
+        chest_data = [
+            (self.width // 2 - 300, ship_deck_y - 30, 0),      # Left: opens immediately
+            (self.width // 2, ship_deck_y - 30, 300),          # Center: opens after 5 sec
+            (self.width // 2 + 300, ship_deck_y - 30, 600)     # Right: opens after 10 sec
+        ]
+        for x, y, delay in chest_data:
+            self.treasure_chests.append(TreasureChest(x, y, delay))
+
+        # Create pirate ship
+        self.pirate_ship = PirateShip(self.width // 2)
+
+        # Create light rays
+        self.light_rays = []
+        for x_pos in self.scenario["light_rays"]:
+            self.light_rays.append(LightRay(x_pos, self.render_rng))
+
+    def active_scene(self):
+        """The background scene currently playing, or None"""
+        return self.background_scenes[self.background_scene]
+
+    def births_allowed(self, species, wanted):
+        """How many of `wanted` newborns the tank has room for
+
+        Litters shrink in proportion to the room left under the species'
+        carrying capacity, and stop once it's reached.
+        """
+        capacity = self.carrying_capacity.get(species)
+        if capacity is None:
+            return wanted
+        room = capacity - self.population[species]
+        if room <= 0:
+            return 0
+        return min(room, math.ceil(wanted * room / capacity))
+
+    def spawn_feeder(self, x, y):
+        """A feeder is born: an individual, or part of a shoal past the budget"""
+        self.population["feeders"] += 1
+        shoals = self.shoals
+        if shoals and self.population["feeders"] - shoals.total > shoals.budget:
+            shoals.add(x, y)
+            return
+        self.add_feeder(x, y)
+
+    def add_feeder(self, x, y):
+        """Add a newborn feeder fish using the scenario's feeder parameters"""
+        if self.feeder_swarm:
+            self.feeder_swarm.spawn(x, y, self.feeder_params["size"], self.feeder_params["speed"])
+            return
+        self.new_feeders.append(FeederFish(
+            x, y, self.timers, self.sim_rng,
+            size=self.feeder_params["size"], speed=self.feeder_params["speed"]))
+
+    def set_target(self, predator, feeder):
+        """Point a predator at a feeder (or None), keeping chasers up to date
+
+        A claimed feeder also leaves this tick's feeder grid so the other
+        predators' searches don't have to skip over it.
+        """
+        if predator.target is not None:
+            del self.chasers[predator.target]
+        predator.target = feeder
+        if feeder is not None:
+            self.chasers[feeder] = predator
+            self.feeder_grid.remove(feeder)
+
+    def consume(self):
+        """All breeders eat whatever is in range, then eaten food is cleared out"""
+        if self.vectorized:
+            food = [food for food in self.food_particles if food.alive and not food.eaten]
+            algae = [algae for algae in self.algae_patches if algae.alive]
+            eaten, bitten = consume_batched(self.fish_list, food, algae)
+            ate = bool(eaten)
+            for algae in bitten:
+                if algae.is_dead():
+                    self.remove_algae(algae)
+        else:
+            ate = False
+            for fish in self.fish_list:
+                if fish.eat(self):
+                    ate = True
+        if ate:
+            self.food_particles[:] = [food for food in self.food_particles if not food.eaten]
+            self.food_grid.rebuild(food for food in self.food_particles if food.alive)
+
+    def kill(self, entity):
+        """Mark an entity dead; it stays in its list until apply_commands()"""
+        entity.alive = False
+        self.has_dead = True
+
+    def apply_commands(self):
+        """Apply the tick's spawns and despawns in one batch
+
+        Newcomers are appended to their lists, then dead entities are
+        compacted out with one pass per list (survivors keep their order).
+        Compacting last also drops anything killed before it ever appeared,
+        like a pellet whose decay timer fired while it was still pending.
+        """
+        for algae in self.new_algae:
+            self.algae_grid.insert(algae)
+        for entities, new in ((self.food_particles, self.new_food),
+                              (self.algae_patches, self.new_algae),
+                              (self.bubble_list, self.new_bubbles),
+                              (self.feeder_fish_list, self.new_feeders)):
+            if new:
+                entities.extend(new)
+                new.clear()
+
+        if self.has_dead:
+            for entities in (self.food_particles, self.algae_patches, self.bubble_list):
+                entities[:] = [entity for entity in entities if entity.alive]
+            if not self.feeder_swarm:
+                self.feeder_fish_list[:] = [
+                    feeder for feeder in self.feeder_fish_list if feeder.alive]
+            self.has_dead = False
+        if self.feeder_swarm:
+            self.feeder_swarm.apply()
+
+    def drop_food(self, x, y):
+        """Drop a food pellet into the tank (it appears at the end of the tick)"""
+        food = FoodParticle(x, y)
+        self.new_food.append(food)
+        self.timers.after(food.lifetime(), self.expire_food, food)
+
+    def expire_food(self, food):
+        """Scheduled when the pellet was dropped: it decays or hits the bottom"""
+        if food.eaten or not food.alive:
+            return    # Already gone
+        # Uneaten food decays and adds nitrates
+        self.water_chemistry.add_waste(2)
+        self.kill(food)
+
+    def spawn_algae(self):
+        """Spawn algae when nitrates are high (a scheduled event)"""
+        nitrates = self.water_chemistry.nitrates
+        if nitrates <= 25:
+            # The chemistry update restarts spawning once nitrates rise
+            self.algae_scheduled = False
+            return
+        self.timers.after(181, self.spawn_algae)    # Every 3 seconds
+
+        # Spawn multiple algae patches (more when nitrates are higher)
+        num_spawns = 2 if nitrates > 50 else 1
+        num_spawns = 3 if nitrates > 75 else num_spawns
+        num_spawns = self.births_allowed("algae", num_spawns)
+
+        for _ in range(num_spawns):
+            # Spawn on rocks or sand (but not near edges!)
+            if self.sim_rng.random() < 0.5 and len(self.rocks) > 0:
+                # Spawn on a random rock
+                rock = self.sim_rng.choice(self.rocks)
+                x = rock.x + self.sim_rng.randint(0, rock.width)
+                y = rock.y + self.sim_rng.randint(0, rock.height)
+            else:
+                # Spawn on sand
+                x = self.sim_rng.randint(100, self.width - 100)  # Keep away from edges
+                y = self.sim_rng.randint(700, 780)
+
+            # Only spawn if not too close to edges
+            if 100 < x < self.width - 100 and 100 < y < 680:
+                self.add_algae(AlgaePatch(x, y, self.ticks))
+
+    def add_algae(self, algae):
+        self.population["algae"] += 1
+        self.new_algae.append(algae)
+
+    def remove_algae(self, algae):
+        """Algae eaten away: out of the grid now, out of the list at the end of the tick"""
+        self.population["algae"] -= 1
+        self.kill(algae)
+        self.algae_grid.remove(algae)
+
+    def moving_entities(self):
+        """Every entity that is drawn between its previous and current position"""
+        # (swarm feeders are snapshotted by FeederSwarm.snapshot)
+        feeders = [] if self.feeder_swarm else self.feeder_fish_list
+        return (self.food_particles + self.bubble_list + self.fish_list +
+                feeders + self.predator_fish_list)
+
+    def step(self):
+        """Advance the whole tank by one simulation tick"""
+        self.ticks += 1
+        chemistry = self.water_chemistry
+        prof = self.profiler
+
+        # Remember where everything was so rendering can interpolate
+        with prof.phase("snapshot positions"):
+            for entity in self.moving_entities():
+                entity.prev_x = entity.x
+                entity.prev_y = entity.y
+            if self.feeder_swarm:
+                self.feeder_swarm.snapshot()
+
+        # Run whatever is scheduled for this tick (food decay, algae spawning)
+        with prof.phase("TimerQueue.advance"):
+            self.timers.advance(self.ticks)
+
+        # Update food particles
+        with prof.phase("FoodParticle.update"):
+            for food in self.food_particles:
+                food.update()
+
+            # Auto-feed pellets every 3 seconds
+            if self.ticks % 180 == 0:  # Every 3 seconds
+                # Random position in center area of tank
+                auto_feed_x = self.sim_rng.randint(150, self.width - 150)
+                auto_feed_y = self.sim_rng.randint(100, 400)
+                self.drop_food(auto_feed_x, auto_feed_y)
+
+            # Index this tick's food positions (eaten pellets can't be found)
+            self.food_grid.rebuild(
+                food for food in self.food_particles if food.alive and not food.eaten)
+
+        # Water quality, and the fish speed that follows from it
+        if self.rates.due("chemistry", self.ticks):
+            with prof.phase("WaterChemistry.update"):
+                chemistry.update(self.rates.intervals["chemistry"])
+                self.fish_health = chemistry.affects_fish_health()
+                if not self.algae_scheduled and chemistry.nitrates > 25:
+                    self.algae_scheduled = True
+                    self.timers.after(1, self.spawn_algae)
+
+        # Update algae growth (patches eaten away are removed as they're eaten)
+        with prof.phase("AlgaePatch.update"):
+            for algae in self.rates.share("algae", self.ticks, self.algae_patches):
+                algae.grow(chemistry.nitrates, self.ticks)
+
+        # Update scenery (light rays, ship, kelp, chests, corals)
+        with prof.phase("LightRay.update"):
+            for ray in self.light_rays:
+                ray.update()
+        with prof.phase("PirateShip.update"):
+            self.pirate_ship.update()
+        with prof.phase("Kelp.update"):
+            for kelp in self.kelp_list:
+                kelp.update()
+        with prof.phase("TreasureChest.update"):
+            for chest in self.treasure_chests:
+                chest.update(self.new_bubbles, self.sim_rng, self.ticks)
+        with prof.phase("Coral.update"):
+            for coral in self.coral_list:
+                coral.update()
+            for coral in self.rates.share("coral", self.ticks, self.coral_list):
+                coral.grow(self.ticks)
+
+        # Update bubbles
+        with prof.phase("Bubble.update"):
+            for bubble in self.bubble_list:
+                bubble.update()
+                if bubble.is_expired():
+                    self.kill(bubble)
+
+        # Breeders eat first, all together, so food is only ever eaten once
+        with prof.phase("Fish.consume"):
+            self.consume()
+
+        # Update breeder fish (water quality sets everyone's speed)
+        with prof.phase("Fish.update"):
+            if self.vectorized:
+                targets = [fish.forage(self) for fish in self.fish_list]
+                steer_breeders(self.fish_list, targets, self.fish_health, self.width,
+                               self.steering_rng)
+            else:
+                for fish in self.fish_list:
+                    fish.update(self)
+
+        # Feeders turn with their school before they move
+        if self.schooling:
+            with prof.phase("FeederFish.school"):
+                if self.feeder_swarm:
+                    self.feeder_swarm.school(self.predator_fish_list)
+                else:
+                    school_feeders(self.feeder_fish_list, self.predator_fish_list)
+
+        # Update feeder fish
+        with prof.phase("FeederFish.update"):
+            if self.feeder_swarm:
+                self.feeder_swarm.update(self)
+                self.feeder_grid.fill()
+            else:
+                for feeder in self.feeder_fish_list:
+                    feeder.update(self)
+                self.feeder_grid.rebuild(
+                    feeder for feeder in self.feeder_fish_list
+                    if feeder.is_targetable() and not feeder.being_chased)
+
+        # Update predator fish
+        with prof.phase("PredatorFish.update"):
+            if self.vectorized:
+                catches = chase_predators(self)
+            else:
+                catches = []
+                for predator in self.predator_fish_list:
+                    caught_fish = predator.update(self)
+                    if caught_fish:
+                        catches.append((predator, caught_fish))
+            # A caught fish stays claimed until here, so nobody else targets it
+            for predator, caught_fish in catches:
+                self.set_target(predator, None)
+                self.kill(caught_fish)
+                self.population["feeders"] -= 1
+
+        # Feeders past the render budget (only when the scenario sets one)
+        if self.shoals and self.rates.due("shoals", self.ticks):
+            with prof.phase("FeederShoals.update"):
+                self.shoals.update(self, self.rates.intervals["shoals"])
+
+        # Update theatre layer
+        scene = self.active_scene()
+        if scene:
+            with prof.phase(type(scene).__name__ + ".update"):
+                scene.update()
+
+        # Spawns and deaths from every subsystem take effect together
+        with prof.phase("apply commands"):
+            self.apply_commands()
+
+    def render(self, surface, alpha=1.0):
+        """Draw everything (back to front layering)
+
+        alpha is how far real time has moved from the previous tick towards
+        the current one (0..1); moving entities are drawn in between.
+        """
+        prof = self.profiler
+        with prof.phase("draw_gradient_background"):
+            draw_gradient_background(surface)
+
+        # Light rays (very back, behind everything)
+        with prof.phase("LightRay.draw"):
+            for ray in self.light_rays:
+                ray.draw(surface)
+
+        with prof.phase("draw_sand"):
+            draw_sand(surface, self.sand_grains)
+
+        # Pirate ship (deep background)
+        with prof.phase("PirateShip.draw"):
+            self.pirate_ship.draw(surface)
+
+        # Kelp (behind rocks)
+        with prof.phase("Kelp.draw"):
+            for kelp in self.kelp_list:
+                kelp.draw(surface)
+
+        with prof.phase("draw_rocks"):
+            draw_rocks(surface, self.rocks, self.rock_details)
+
+        # Treasure chests on sand
+        with prof.phase("TreasureChest.draw"):
+            for chest in self.treasure_chests:
+                chest.draw(surface, self.render_rng)
+
+        # Corals
+        with prof.phase("Coral.draw"):
+            for coral in self.coral_list:
+                coral.draw(surface)
+
+        # Draw food particles
+        with prof.phase("FoodParticle.draw"):
+            for food in self.food_particles:
+                if not food.eaten:
+                    draw_interpolated(food, alpha, surface)
+
+        # Draw algae (patches eaten away this tick are removed next tick)
+        with prof.phase("AlgaePatch.draw"):
+            for algae in self.algae_patches:
+                if not algae.is_dead():
+                    algae.draw(surface, self.render_rng)
+
+        # Bubbles (in front of most things)
+        with prof.phase("Bubble.draw"):
+            for bubble in self.bubble_list:
+                draw_interpolated(bubble, alpha, surface)
+
+        # Breeder fish
+        with prof.phase("Fish.draw"):
+            for fish in self.fish_list:
+                draw_interpolated(fish, alpha, surface, self.fish_style)
+
+        # Feeder fish
+        with prof.phase("FeederFish.draw"):
+            if self.shoals:
+                self.shoals.draw(surface, self.ticks)
+            for feeder in self.feeder_fish_list:
+                draw_interpolated(feeder, alpha, surface, self.fish_style)
+
+        # Predator fish
+        with prof.phase("PredatorFish.draw"):
+            for predator in self.predator_fish_list:
+                draw_interpolated(predator, alpha, surface, self.fish_style)
+
+        # Theatre layer - draws ABOVE all aquarium elements at BG_Y line
+        scene = self.active_scene()
+        if scene:
+            with prof.phase(type(scene).__name__ + ".draw"):
+                scene.draw(surface, self.render_rng)
+
+
+def draw_interpolated(entity, alpha, *draw_args):
+    """Draw an entity part way between its previous and current tick position"""
+    x, y = entity.x, entity.y
+    entity.x = entity.prev_x + (x - entity.prev_x) * alpha
+    entity.y = entity.prev_y + (y - entity.prev_y) * alpha
+    entity.draw(*draw_args)
+    entity.x, entity.y = x, y
+
+
+# Fonts for UI (loaded on first use so importing stays cheap)
+_fonts = {}
+
+
+def get_font(size):
+    """Load the UI font once per size"""
+    if size not in _fonts:
+        if not pygame.font.get_init():
+            pygame.font.init()
+        _fonts[size] = pygame.font.SysFont('Arial', size)
+    return _fonts[size]
+
+
+def draw_ui(screen, world):
     """Draw water chemistry and instructions"""
+    font = get_font(20)
+    small_font = get_font(16)
+    water_chemistry = world.water_chemistry
+
     # Background panel for UI
-    ui_panel = pygame.Rect(10, 10, 320, 210)
+    ui_panel = pygame.Rect(10, 10, 320, 240)
     pygame.draw.rect(screen, (0, 0, 0, 128), ui_panel)
     pygame.draw.rect(screen, WHITE, ui_panel, 2)
 
@@ -3525,24 +5416,37 @@ def draw_ui():
     screen.blit(status_text, (20, 45))
     
     # Fish style display
-    style_text = font.render(f"Fish Style: {fish_style_names[fish_style]}", True, (100, 200, 255))
+    style_text = font.render(f"Fish Style: {fish_style_names[world.fish_style]}", True, (100, 200, 255))
     screen.blit(style_text, (20, 75))
     
     # Background scene display
-    scene_color = (255, 200, 100) if background_scene > 0 else (150, 150, 150)
-    scene_text = font.render(f"Scene: {background_scene_names[background_scene]}", True, scene_color)
+    scene_color = (255, 200, 100) if world.background_scene > 0 else (150, 150, 150)
+    scene_text = font.render(f"Scene: {background_scene_names[world.background_scene]}", True, scene_color)
     screen.blit(scene_text, (20, 100))
 
+    # Population against the carrying capacity
+    counts = []
+    for species in ("feeders", "algae"):
+        count = world.population[species]
+        capacity = world.carrying_capacity.get(species)
+        counts.append(f"{species.capitalize()}: {count}" +
+                      (f"/{capacity}" if capacity is not None else ""))
+    full = any(world.births_allowed(species, 1) == 0 for species in ("feeders", "algae"))
+    population_text = font.render(" | ".join(counts), True, YELLOW if full else WHITE)
+    screen.blit(population_text, (20, 125))
+
     # Instructions
     instruction1 = small_font.render("Click: Food | W: Water | F: Fish Style", True, WHITE)
     instruction2 = small_font.render("1-4: Nature | 5-8: Military", True, WHITE)
     instruction3 = small_font.render("B: Cycle Scene | 0: Scene Off | H: Hide UI", True, (255, 200, 100))
-    screen.blit(instruction1, (20, 130))
-    screen.blit(instruction2, (20, 150))
-    screen.blit(instruction3, (20, 170))
+    instruction4 = small_font.render("P: Frame Profiler | C: cProfile Capture", True, (255, 200, 100))
+    screen.blit(instruction1, (20, 155))
+    screen.blit(instruction2, (20, 175))
+    screen.blit(instruction3, (20, 195))
+    screen.blit(instruction4, (20, 215))
 
 
-def draw_gradient_background():
+def draw_gradient_background(screen):
     """Draw ocean with depth gradient (lighter at top, darker at bottom)"""
     for y in range(HEIGHT):
         # Interpolate between light and dark blue based on depth
@@ -3550,12 +5454,12 @@ def draw_gradient_background():
         r = int(OCEAN_BLUE[0] + (OCEAN_DEEP[0] - OCEAN_BLUE[0]) * ratio)
         g = int(OCEAN_BLUE[1] + (OCEAN_DEEP[1] - OCEAN_BLUE[1]) * ratio)
         b = int(OCEAN_BLUE[2] + (OCEAN_DEEP[2] - OCEAN_BLUE[2]) * ratio)
-        pygame.draw.line(screen, (r, g, b), (0, y), (WIDTH, y))
+        pygame.draw.line(screen, (r, g, b), (0, y), (screen.get_width(), y))
 
 
-def draw_sand():
+def draw_sand(screen, sand_grains):
     """Draw sandy bottom with some texture"""
-    sand_rect = pygame.Rect(0, 700, WIDTH, 100)
+    sand_rect = pygame.Rect(0, 700, screen.get_width(), 100)
     pygame.draw.rect(screen, SAND_COLOR, sand_rect)
 
     # Draw pre-generated sand grains (no flickering!)
@@ -3564,7 +5468,7 @@ def draw_sand():
         pygame.draw.circle(screen, color, (x, y), 1)
 
 
-def draw_rocks():
+def draw_rocks(screen, rocks, rock_details):
     """Draw rock formations with simple shading"""
     for i, rock in enumerate(rocks):
         # Draw main rock body
@@ -3581,194 +5485,255 @@ def draw_rocks():
             pygame.draw.line(screen, (60, 50, 40), start, end, 2)
 
 
-# Main game loop
-running = True
-frame_count = 0
-while running:
-    frame_count += 1
-
-    # Handle events
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-        if event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_ESCAPE:
-                running = False
-            if event.key == pygame.K_w:
-                # Water change
-                water_chemistry.water_change(0.25)
-            if event.key == pygame.K_f:
-                # Cycle fish style
-                fish_style = (fish_style + 1) % 8
-            if event.key == pygame.K_1:
-                fish_style = 0  # Realistic
-            if event.key == pygame.K_2:
-                fish_style = 1  # Cartoon
-            if event.key == pygame.K_3:
-                fish_style = 2  # Pixel
-            if event.key == pygame.K_4:
-                fish_style = 3  # Tropical
-            if event.key == pygame.K_5:
-                fish_style = 4  # Army
-            if event.key == pygame.K_6:
-                fish_style = 5  # Air Force
-            if event.key == pygame.K_7:
-                fish_style = 6  # Space Force
-            if event.key == pygame.K_8:
-                fish_style = 7  # Navy
-            if event.key == pygame.K_b:
-                # Cycle background scene
-                background_scene = (background_scene + 1) % 6
-            if event.key == pygame.K_0:
-                background_scene = 0  # None
-            if event.key == pygame.K_h:
-                # Toggle UI visibility
-                ui_visible = not ui_visible
-        if event.type == pygame.MOUSEBUTTONDOWN:
-            # Drop food where clicked
-            mx, my = pygame.mouse.get_pos()
-            food_particles.append(FoodParticle(mx, my))
-
-    # Update food particles
-    for food in food_particles[:]:
-        food.update()
-        if food.is_expired():
-            # Uneaten food decays and adds nitrates
-            if not food.eaten:
-                water_chemistry.add_waste(2)
-            food_particles.remove(food)
-
-    # Fish naturally produce waste over time
-    if frame_count % 120 == 0:  # Every 2 seconds
-        water_chemistry.add_waste(0.5)
-
-    # Auto-feed pellets every 3 seconds
-    if frame_count % 180 == 0:  # Every 3 seconds
-        # Random position in center area of tank
-        auto_feed_x = random.randint(150, WIDTH - 150)
-        auto_feed_y = random.randint(100, 400)
-        food_particles.append(FoodParticle(auto_feed_x, auto_feed_y))
-
-    # Spawn algae when nitrates are high
-    algae_spawn_timer += 1
-    if algae_spawn_timer > 180 and water_chemistry.nitrates > 25:    # Every 3 seconds
-        algae_spawn_timer = 0
-
-        # Spawn multiple algae patches (more when nitrates are higher)
-        num_spawns = 2 if water_chemistry.nitrates > 50 else 1
-        num_spawns = 3 if water_chemistry.nitrates > 75 else num_spawns
-
-        for _ in range(num_spawns):
-            # Spawn on rocks or sand (but not near edges!)
-            if random.random() < 0.5 and len(rocks) > 0:
-                # Spawn on a random rock
-                rock = random.choice(rocks)
-                x = rock.x + random.randint(0, rock.width)
-                y = rock.y + random.randint(0, rock.height)
-            else:
-                # Spawn on sand
-                x = random.randint(100, WIDTH - 100)  # Keep away from edges
-                y = random.randint(700, 780)
-
-            # Only spawn if not too close to edges
-            if 100 < x < WIDTH - 100 and 100 < y < 680:
-                algae_patches.append(AlgaePatch(x, y))
-
-    # Update algae growth
-    for algae in algae_patches[:]:
-        algae.grow(water_chemistry.nitrates)
-        if algae.is_dead():
-            algae_patches.remove(algae)
-
-    # Draw everything (back to front layering)
-    draw_gradient_background()
-
-    # Light rays (very back, behind everything)
-    for ray in light_rays:
-        ray.update()
-        ray.draw(screen)
-
-    draw_sand()
-
-    # Pirate ship (deep background)
-    pirate_ship.update()
-    pirate_ship.draw(screen)
-
-    # Update and draw kelp (behind rocks)
-    for kelp in kelp_list:
-        kelp.update()
-        kelp.draw(screen)
-
-    draw_rocks()
-
-    # Treasure chests on sand
-    for chest in treasure_chests:
-        chest.update(bubble_list)
-        chest.draw(screen)
-
-    # Update and draw corals
-    for coral in coral_list:
-        coral.update()
-        coral.draw(screen)
-
-    # Draw food particles
-    for food in food_particles:
-        if not food.eaten:
-            food.draw(screen)
-
-    # Draw algae
-    for algae in algae_patches:
-        algae.draw(screen)
-
-    # Update and draw bubbles (in front of most things)
-    for bubble in bubble_list[:]:
-        bubble.update()
-        if bubble.is_expired():
-            bubble_list.remove(bubble)
-        else:
-            bubble.draw(screen)
-
-    # Update and draw breeder fish
-    for fish in fish_list:
-        fish.update(food_particles, water_chemistry, algae_patches)
-        fish.draw(screen)
-
-    # Update and draw feeder fish
-    for feeder in feeder_fish_list[:]:
-        feeder.update(predator_fish_list)
-        feeder.draw(screen)
-
-    # Update and draw predator fish
-    for predator in predator_fish_list:
-        caught_fish = predator.update(feeder_fish_list, predator_fish_list)
-        if caught_fish:
-            feeder_fish_list.remove(caught_fish)
-        predator.draw(screen)
-
-    # Theatre layer - draws ABOVE all aquarium elements at BG_Y line
-    if background_scene == 1:
-        bg_whale.update()
-        bg_whale.draw(screen)
-    elif background_scene == 2:
-        bg_tank.update()
-        bg_tank.draw(screen)
-    elif background_scene == 3:
-        bg_jet.update()
-        bg_jet.draw(screen)
-    elif background_scene == 4:
-        bg_battleship.update()
-        bg_battleship.draw(screen)
-    elif background_scene == 5:
-        bg_shuttle.update()
-        bg_shuttle.draw(screen)
-
-    # Draw UI (toggleable with H key)
-    if ui_visible:
-        draw_ui()
-
-    # Update display
-    pygame.display.flip()
-    clock.tick(FPS)
-
-pygame.quit()
-sys.exit()
+def draw_profiler_hud(screen, profiler, max_rows=16):
+    """Overlay rolling per-phase frame times and a frame-time graph"""
+    font = get_font(14)
+    budget_ms = 1000 / SIM_HZ
+    averages = profiler.averages()[:max_rows]
+
+    # Panel in the top-right corner
+    panel_width = 330
+    graph_height = 60
+    panel_height = 40 + len(averages) * 16 + graph_height + 10
+    panel_x = screen.get_width() - panel_width - 10
+    panel = pygame.Surface((panel_width, panel_height), pygame.SRCALPHA)
+    panel.fill((0, 0, 0, 170))
+    screen.blit(panel, (panel_x, 10))
+    pygame.draw.rect(screen, WHITE, (panel_x, 10, panel_width, panel_height), 1)
+
+    frame_ms = profiler.average_frame_ms()
+    header_color = GREEN if frame_ms <= budget_ms else RED
+    header = font.render(
+        f"Frame {frame_ms:5.2f} ms  (budget {budget_ms:.1f} ms)", True, header_color)
+    screen.blit(header, (panel_x + 8, 16))
+
+    # One row per phase, with a bar showing its share of the budget
+    y = 40
+    for name, ms in averages:
+        bar_width = int(min(1.0, ms / budget_ms) * 90)
+        pygame.draw.rect(screen, (255, 200, 100), (panel_x + 8, y + 3, bar_width, 9))
+        label = font.render(f"{ms:6.2f}  {name}", True, WHITE)
+        screen.blit(label, (panel_x + 104, y))
+        y += 16
+
+    # Frame-time graph, newest on the right, with the 60 FPS budget line
+    graph_top = y + 6
+    graph_rect = pygame.Rect(panel_x + 8, graph_top, panel_width - 16, graph_height)
+    pygame.draw.rect(screen, (40, 40, 40), graph_rect)
+    scale_ms = max(budget_ms * 2, max(profiler.frame_history, default=0))
+    budget_y = graph_rect.bottom - int(budget_ms / scale_ms * graph_height)
+    pygame.draw.line(screen, (120, 120, 120), (graph_rect.left, budget_y),
+                     (graph_rect.right, budget_y), 1)
+    history = list(profiler.frame_history)
+    step = graph_rect.width / max(1, profiler.history - 1)
+    points = []
+    for i, ms in enumerate(history):
+        x = graph_rect.right - (len(history) - 1 - i) * step
+        points.append((x, graph_rect.bottom - int(min(ms, scale_ms) / scale_ms * graph_height)))
+    if len(points) > 1:
+        pygame.draw.lines(screen, GREEN, False, points, 1)
+
+
+def report_headless_run(world, ticks, elapsed):
+    """Print simulation throughput and final tank state"""
+    ticks_per_sec = ticks / elapsed if elapsed > 0 else float("inf")
+    print(f"Scenario: {world.scenario['name']}")
+    if world.seed is not None:
+        print(f"Seed: {world.seed}")
+    print(f"Simulated {ticks} ticks in {elapsed:.2f}s ({ticks_per_sec:.1f} ticks/sec)")
+    print(f"Breeders: {len(world.fish_list)} | Feeders: {len(world.feeder_fish_list)} | "
+          f"Predators: {len(world.predator_fish_list)}")
+    if world.shoals:
+        print(f"Shoals: {world.shoals.total} feeders beyond the budget of "
+              f"{world.shoals.budget}")
+    capacity = ", ".join(f"{species} {limit}" for species, limit in
+                         world.carrying_capacity.items() if limit is not None)
+    if capacity:
+        print(f"Carrying capacity: {capacity}")
+    print(f"Algae: {len(world.algae_patches)} | Food: {len(world.food_particles)} | "
+          f"Bubbles: {len(world.bubble_list)}")
+    print(f"Nitrates: {world.water_chemistry.nitrates:.1f}/{world.water_chemistry.max_nitrates}")
+
+
+def run_headless(world, ticks, capture=None):
+    """Step the world as fast as possible without drawing anything"""
+    profiler = world.profiler
+    start_time = time.perf_counter()
+    for _ in range(ticks):
+        if capture:
+            capture.start_frame()
+        profiler.begin_frame()
+        world.step()
+        profiler.end_frame()
+        if capture and capture.end_frame():
+            capture.finish()
+            capture = None
+    report_headless_run(world, ticks, time.perf_counter() - start_time)
+    # Fewer ticks than --cprofile-frames: report what was captured
+    if capture:
+        capture.finish()
+
+
+def handle_key(world, key):
+    """Apply a keyboard shortcut to the world"""
+    if key == pygame.K_w:
+        # Water change
+        world.water_chemistry.water_change(0.25)
+    if key == pygame.K_f:
+        # Cycle fish style
+        world.fish_style = (world.fish_style + 1) % 8
+    if key == pygame.K_1:
+        world.fish_style = 0  # Realistic
+    if key == pygame.K_2:
+        world.fish_style = 1  # Cartoon
+    if key == pygame.K_3:
+        world.fish_style = 2  # Pixel
+    if key == pygame.K_4:
+        world.fish_style = 3  # Tropical
+    if key == pygame.K_5:
+        world.fish_style = 4  # Army
+    if key == pygame.K_6:
+        world.fish_style = 5  # Air Force
+    if key == pygame.K_7:
+        world.fish_style = 6  # Space Force
+    if key == pygame.K_8:
+        world.fish_style = 7  # Navy
+    if key == pygame.K_b:
+        # Cycle background scene
+        world.background_scene = (world.background_scene + 1) % 6
+    if key == pygame.K_0:
+        world.background_scene = 0  # None
+
+
+def main():
+    args = parse_args()
+
+    # Headless runs use SDL's dummy video driver so no window is opened
+    if args.headless:
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
+
+    scenario = DEFAULT_SCENARIO
+    if args.scenario:
+        try:
+            scenario = load_scenario(args.scenario)
+        except (OSError, ValueError) as e:
+            print(f"ERROR: could not load scenario: {e}")
+            sys.exit(1)
+    if args.numpy:
+        if np is None:
+            print("ERROR: --numpy needs NumPy installed (pip install numpy)")
+            sys.exit(1)
+        scenario = dict(scenario, backend="numpy")
+    if args.schooling:
+        scenario = dict(scenario, schooling=True)
+
+    # Initialize Pygame
+    pygame.init()
+    try:
+        world = World(scenario, seed=args.seed)
+    except (TypeError, ValueError) as e:
+        print(f"ERROR: could not load scenario: {e}")
+        sys.exit(1)
+
+    # Per-phase frame timings, shown with the P key and/or traced to a file
+    profiler = FrameProfiler()
+    if args.trace:
+        profiler.tracer = TraceRecorder(args.trace, args.trace_frames)
+
+    # cProfile capture of the first frames (--cprofile) or on demand (C key)
+    capture = None
+    if args.cprofile:
+        capture = ProfileCapture(args.cprofile, args.cprofile_frames)
+
+    if args.headless:
+        if args.trace:
+            world.profiler = profiler
+        run_headless(world, args.ticks, capture)
+        profiler.finish_trace()
+        pygame.quit()
+        return
+
+    screen = pygame.display.set_mode((world.width, HEIGHT))
+    pygame.display.set_caption("Coral Reef Aquarium")
+
+    # Clock for controlling frame rate
+    clock = pygame.time.Clock()
+
+    # UI visibility toggle
+    ui_visible = True
+
+    world.profiler = profiler
+    show_profiler = False
+
+    # Main game loop: the simulation advances in fixed SIM_DT ticks using
+    # an accumulator, and each frame is drawn interpolated between ticks
+    running = True
+    accumulator = 0.0
+    previous_time = time.perf_counter()
+    while running:
+        now = time.perf_counter()
+        accumulator += min(now - previous_time, MAX_FRAME_TIME)
+        previous_time = now
+        if capture:
+            capture.start_frame()
+        profiler.begin_frame()
+
+        # Handle events
+        with profiler.phase("events"):
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
+                if event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_ESCAPE:
+                        running = False
+                    if event.key == pygame.K_h:
+                        # Toggle UI visibility
+                        ui_visible = not ui_visible
+                    if event.key == pygame.K_p:
+                        # Toggle frame profiler overlay
+                        show_profiler = not show_profiler
+                    if event.key == pygame.K_c and capture is None:
+                        # Profile the next frames with cProfile
+                        path = time.strftime("aquarium_profile_%Y%m%d_%H%M%S.pstats")
+                        capture = ProfileCapture(path, args.cprofile_frames)
+                        print(f"Capturing cProfile for the next {args.cprofile_frames} frames...")
+                    handle_key(world, event.key)
+                if event.type == pygame.MOUSEBUTTONDOWN:
+                    # Drop food where clicked
+                    mx, my = pygame.mouse.get_pos()
+                    world.drop_food(mx, my)
+
+        while accumulator >= SIM_DT:
+            world.step()
+            accumulator -= SIM_DT
+        world.render(screen, accumulator / SIM_DT)
+
+        # Draw UI (toggleable with H key)
+        if ui_visible:
+            with profiler.phase("draw_ui"):
+                draw_ui(screen, world)
+
+        # Frame profiler overlay (toggleable with P key)
+        if show_profiler:
+            with profiler.phase("draw_profiler_hud"):
+                draw_profiler_hud(screen, profiler)
+
+        # Update display
+        with profiler.phase("display.flip"):
+            pygame.display.flip()
+        profiler.end_frame()
+        if capture and capture.end_frame():
+            capture.finish()
+            capture = None
+        clock.tick(args.fps)
+
+    # Quitting before the traced/profiled frames were all captured still saves them
+    profiler.finish_trace()
+    if capture:
+        capture.finish()
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
+    sys.exit()
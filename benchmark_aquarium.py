@@ -0,0 +1,546 @@
+"""
+Benchmark Script for Coral Reef Aquarium
+This script runs the aquarium without a window through a set of standard
+scenarios and measures how long each simulation tick and each rendered
+frame takes, so performance changes can be compared run to run.
+
+USAGE:
+1. Place this script in the same folder as the aquarium file
+2. Run: python benchmark_aquarium.py
+3. Results are written to benchmark_results.json
+
+OPTIONS:
+- python benchmark_aquarium.py --list                   (show scenario names)
+- python benchmark_aquarium.py --only default feeders_1k
+- python benchmark_aquarium.py --baseline old.json      (compare, exit 1 on regression)
+- python benchmark_aquarium.py --soak                   (24 simulated hours, memory report)
+
+Every run also reports the memory held by one entity of each class.
+
+Works on a plain Linux box with no display: SDL's dummy video driver is used.
+"""
+
+import argparse
+import gc
+import importlib.util
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+# Must be set before pygame is imported
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+AQUARIUM_FILES = ["aquarium (6).py", "aquarium__6_.py"]
+
+# Every scenario runs with the same seed so the workload is identical run to run
+BENCH_SEED = 1234
+
+# Percentiles reported for each timing series
+PERCENTILES = [50, 95, 99]
+
+# Allocation sites listed in the soak report
+SOAK_TOP_SITES = 10
+
+# Tank measured for the bytes-per-entity report: some of every entity kind
+MEMORY_SCENARIO = {"initial_nitrates": 80, "algae": {"count": 20}, "feeders": {"count": 50}}
+MEMORY_TICKS = 240    # Long enough for auto-fed food and chest bubbles
+
+# Values an entity owns outright; anything else it references (other fish,
+# the world's timers) is shared and not counted against it
+OWNED_TYPES = (int, float, str, tuple, list, dict)
+
+
+def load_aquarium():
+    """Import the aquarium script as a module (its file name isn't importable)"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    for name in AQUARIUM_FILES:
+        path = os.path.join(here, name)
+        if os.path.exists(path):
+            spec = importlib.util.spec_from_file_location("aquarium", path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            return module
+    print("ERROR: aquarium script not found next to benchmark_aquarium.py!")
+    print("Looked for: " + ", ".join(AQUARIUM_FILES))
+    sys.exit(1)
+
+
+def standard_scenarios(aquarium):
+    """Named benchmark scenarios, as overrides on top of the default tank"""
+    scenarios = {
+        "default": {},
+        "feeders_1k": {"feeders": {"count": 1000}},
+        "algae_200": {"initial_nitrates": 80, "algae": {"count": 200}},
+        # 1,000 individuals, the rest as shoals
+        "feeders_100k_shoals": {"feeders": {"count": 100000}, "feeder_budget": 1000},
+    }
+    # The vectorized backend, when NumPy is installed
+    if aquarium.np is not None:
+        scenarios["feeders_1k_numpy"] = {"feeders": {"count": 1000}, "backend": "numpy"}
+    # Schooling feeders (the 5,000 fish school needs the array backend)
+    scenarios["schooling_1k"] = {"feeders": {"count": 1000}, "schooling": True}
+    if aquarium.np is not None:
+        scenarios["schooling_5k_numpy"] = {
+            "feeders": {"count": 5000}, "schooling": True, "backend": "numpy"}
+    # Every fish style, with enough feeders that fish drawing shows up
+    for style, name in enumerate(aquarium.fish_style_names):
+        key = "style_" + name.lower().replace(" ", "_").replace(".", "")
+        scenarios[key] = {"fish_style": style, "feeders": {"count": 100}}
+    # Every background scene
+    for scene, name in enumerate(aquarium.background_scene_names):
+        if scene == 0:
+            continue
+        key = "scene_" + name.lower().replace(" ", "_")
+        scenarios[key] = {"background_scene": scene}
+    return scenarios
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(samples):
+    """p50/p95/p99/max/mean of a list of times, in milliseconds"""
+    ordered = sorted(samples)
+    summary = {f"p{pct}": percentile(ordered, pct) * 1000 for pct in PERCENTILES}
+    summary["max"] = ordered[-1] * 1000 if ordered else 0.0
+    summary["mean"] = sum(ordered) / len(ordered) * 1000 if ordered else 0.0
+    return summary
+
+
+def run_scenario(aquarium, pygame, overrides, ticks, warmup):
+    """Step and render one scenario, timing the two halves of each frame"""
+    scenario = aquarium.build_scenario(overrides, "benchmark")
+    world = aquarium.World(scenario, seed=BENCH_SEED)
+    surface = pygame.Surface((world.width, aquarium.HEIGHT))
+
+    for _ in range(warmup):
+        world.step()
+        world.render(surface)
+
+    # Per-phase averages (schooling, predators, drawing...) for the timed ticks
+    profiler = aquarium.FrameProfiler(history=ticks)
+    world.profiler = profiler
+
+    gc.collect()
+    sim_times = []
+    render_times = []
+    clock = time.perf_counter
+    for _ in range(ticks):
+        profiler.begin_frame()
+        start = clock()
+        world.step()
+        stepped = clock()
+        world.render(surface)
+        aquarium.draw_ui(surface, world)
+        rendered = clock()
+        profiler.end_frame()
+        sim_times.append(stepped - start)
+        render_times.append(rendered - stepped)
+
+    return {
+        "ticks": ticks,
+        "sim_ms": summarize(sim_times),
+        "render_ms": summarize(render_times),
+        "final_counts": {
+            "breeders": len(world.fish_list),
+            "feeders": len(world.feeder_fish_list),
+            "predators": len(world.predator_fish_list),
+            "algae": len(world.algae_patches),
+            "food": len(world.food_particles),
+            "bubbles": len(world.bubble_list),
+        },
+        "nitrates": round(world.water_chemistry.nitrates, 3),
+        "phase_ms": {name: round(ms, 4) for name, ms in profiler.averages()},
+    }
+
+
+def owned_bytes(value, seen):
+    """Size of a builtin value plus everything it contains, each object once"""
+    if id(value) in seen or isinstance(value, bool):
+        return 0
+    seen.add(id(value))
+    size = sys.getsizeof(value)
+    if isinstance(value, (tuple, list)):
+        items = value
+    elif isinstance(value, dict):
+        items = list(value.keys()) + list(value.values())
+    else:
+        return size
+    return size + sum(owned_bytes(item, seen) for item in items
+                      if isinstance(item, OWNED_TYPES))
+
+
+def entity_bytes(entity):
+    """Bytes held by one entity: the object, its __dict__ and its own values"""
+    seen = set()
+    size = sys.getsizeof(entity)
+    attributes = getattr(entity, "__dict__", None)
+    if attributes is not None:
+        size += owned_bytes(attributes, seen)
+    for cls in type(entity).__mro__:
+        for name in cls.__dict__.get("__slots__", ()):
+            try:
+                # Through the slot itself, in case a subclass shadows the name
+                value = cls.__dict__[name].__get__(entity, cls)
+            except AttributeError:
+                continue    # Slot never set
+            if isinstance(value, OWNED_TYPES):
+                size += owned_bytes(value, seen)
+    return size
+
+
+def measure_memory(aquarium):
+    """Average bytes per entity for each entity class in a sample tank"""
+    scenario = aquarium.build_scenario(MEMORY_SCENARIO, "benchmark")
+    world = aquarium.World(scenario, seed=BENCH_SEED)
+    for _ in range(MEMORY_TICKS):
+        world.step()
+
+    sizes = {}
+    for entities in (world.fish_list, world.feeder_fish_list, world.predator_fish_list,
+                     world.algae_patches, world.coral_list, world.bubble_list,
+                     world.food_particles):
+        for entity in entities:
+            sizes.setdefault(type(entity).__name__, []).append(entity_bytes(entity))
+    return {name: round(sum(values) / len(values)) for name, values in sizes.items()}
+
+
+def compare_to_baseline(results, baseline, threshold, noise_floor_ms):
+    """Print a regression report; returns the number of regressions found"""
+    print("\n" + "=" * 60)
+    print(f"Comparison with baseline (threshold {threshold:.0%})")
+    print("=" * 60)
+    print(f"{'scenario':<22}{'metric':<14}{'baseline':>10}{'current':>10}{'change':>9}")
+
+    regressions = 0
+    for name, result in results["scenarios"].items():
+        old = baseline.get("scenarios", {}).get(name)
+        if old is None:
+            print(f"{name:<22}(not in baseline)")
+            continue
+        for series in ("sim_ms", "render_ms"):
+            for stat in [f"p{pct}" for pct in PERCENTILES]:
+                before = old[series][stat]
+                after = result[series][stat]
+                change = (after - before) / before if before > 0 else 0.0
+                # Tiny absolute differences are timer noise, not regressions
+                regressed = change > threshold and after - before > noise_floor_ms
+                marker = "  REGRESSION" if regressed else ""
+                regressions += regressed
+                metric = series.replace("_ms", "") + " " + stat
+                print(f"{name:<22}{metric:<14}{before:>10.3f}{after:>10.3f}{change:>+9.1%}{marker}")
+
+    # Memory is deterministic, so any growth past the threshold counts
+    for name, after in results.get("bytes_per_entity", {}).items():
+        before = baseline.get("bytes_per_entity", {}).get(name)
+        if not before:
+            continue
+        change = (after - before) / before
+        regressed = change > threshold
+        marker = "  REGRESSION" if regressed else ""
+        regressions += regressed
+        print(f"{'memory':<22}{name:<14}{before:>10}{after:>10}{change:>+9.1%}{marker}")
+
+    if regressions:
+        print(f"\n{regressions} regression(s) beyond {threshold:.0%}")
+    else:
+        print("\nNo regressions.")
+    return regressions
+
+
+def current_rss_mb():
+    """Resident memory of this process in MB (None if it can't be read)"""
+    try:
+        # Linux: second field of statm is resident pages
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # Peak rather than current RSS; kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def entity_counts(world):
+    """Length of every list the simulation can grow"""
+    scene_particles = 0
+    for scene in world.background_scenes:
+        if scene is not None:
+            # Missiles, torpedoes, explosions, wake particles, boosters...
+            scene_particles += sum(len(value) for value in vars(scene).values()
+                                   if isinstance(value, list))
+    return {
+        "breeders": len(world.fish_list),
+        "feeders": len(world.feeder_fish_list),
+        "predators": len(world.predator_fish_list),
+        "algae": len(world.algae_patches),
+        "food": len(world.food_particles),
+        "bubbles": len(world.bubble_list),
+        "scene_particles": scene_particles,
+    }
+
+
+def simulation_snapshot():
+    """tracemalloc snapshot without the soak harness's own allocations"""
+    return tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, __file__),
+        tracemalloc.Filter(False, tracemalloc.__file__),
+    ])
+
+
+def top_growth(snapshot, since):
+    """Allocation sites that grew the most between two tracemalloc snapshots"""
+    return snapshot.compare_to(since, "lineno")[:SOAK_TOP_SITES]
+
+
+def growth_report(growth):
+    """JSON-friendly form of top_growth's result"""
+    return [
+        {"site": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+         "size_diff_kib": round(stat.size_diff / 1024, 1),
+         "count_diff": stat.count_diff}
+        for stat in growth
+    ]
+
+
+def run_soak(aquarium, overrides, hours, interval_minutes, ceiling_mb):
+    """Run the simulation headless for many hours of tank time, watching memory
+
+    Every interval the background scene moves on to the next one, so the
+    scenes' particle lists get exercised too, and a snapshot is taken so each
+    sample lists the sites that grew since the previous one. Returns (samples,
+    top allocation sites over the whole run, failure message or None).
+    """
+    scenario = aquarium.build_scenario(overrides, "soak")
+    world = aquarium.World(scenario, seed=BENCH_SEED)
+    total_ticks = int(hours * 3600 * aquarium.SIM_HZ)
+    interval_ticks = max(1, int(interval_minutes * 60 * aquarium.SIM_HZ))
+    scene_count = len(aquarium.background_scene_names)
+
+    tracemalloc.start()
+    gc.collect()
+    first_snapshot = simulation_snapshot()
+    last_snapshot = first_snapshot
+    samples = []
+    failure = None
+    start = time.perf_counter()
+
+    print(f"{'sim time':>9}{'wall s':>9}{'rss MB':>9}{'traced MB':>11}{'feeders':>9}"
+          f"{'algae':>7}{'bubbles':>9}{'scene':>7}")
+    while world.ticks < total_ticks:
+        for _ in range(min(interval_ticks, total_ticks - world.ticks)):
+            world.step()
+        world.background_scene = (world.background_scene + 1) % scene_count
+
+        traced, peak = tracemalloc.get_traced_memory()
+        rss = current_rss_mb()
+        # Growth during this interval alone, so a leak shows up when it starts
+        gc.collect()
+        snapshot = simulation_snapshot()
+        interval_growth = top_growth(snapshot, last_snapshot)
+        last_snapshot = snapshot
+        sample = {
+            "sim_hours": round(world.ticks / aquarium.SIM_HZ / 3600, 3),
+            "wall_seconds": round(time.perf_counter() - start, 1),
+            "rss_mb": round(rss, 1) if rss is not None else None,
+            "traced_mb": round(traced / (1024 * 1024), 2),
+            "traced_peak_mb": round(peak / (1024 * 1024), 2),
+            "counts": entity_counts(world),
+            "top_growth": growth_report(interval_growth),
+        }
+        samples.append(sample)
+        counts = sample["counts"]
+        sim_minutes = world.ticks // (aquarium.SIM_HZ * 60)
+        rss_text = f"{rss:>9.1f}" if rss is not None else f"{'?':>9}"
+        print(f"{sim_minutes // 60:>6}:{sim_minutes % 60:02d}{sample['wall_seconds']:>9.1f}{rss_text}"
+              f"{sample['traced_mb']:>11.2f}{counts['feeders']:>9}{counts['algae']:>7}"
+              f"{counts['bubbles']:>9}{counts['scene_particles']:>7}")
+
+        # Stop as soon as memory passes the ceiling rather than filling the machine
+        memory_mb = rss if rss is not None else sample["traced_mb"]
+        if memory_mb > ceiling_mb:
+            failure = f"memory {memory_mb:.1f} MB exceeded the {ceiling_mb:.0f} MB ceiling"
+            break
+
+    gc.collect()
+    growth = top_growth(simulation_snapshot(), first_snapshot)
+    tracemalloc.stop()
+    return samples, growth, failure
+
+
+def soak(aquarium, args):
+    """--soak: long headless run with a memory report; returns the exit status"""
+    scenarios = standard_scenarios(aquarium)
+    if args.soak_scenario not in scenarios:
+        print(f"ERROR: unknown scenario: {args.soak_scenario}")
+        print("Use --list to see the available scenarios.")
+        return 1
+
+    print("=" * 60)
+    print("Coral Reef Aquarium Soak Test")
+    print("=" * 60)
+    print(f"Scenario {args.soak_scenario}, {args.soak_hours:g} simulated hours, "
+          f"sample every {args.soak_interval:g} minutes, ceiling {args.memory_ceiling:.0f} MB\n")
+    samples, growth, failure = run_soak(aquarium, scenarios[args.soak_scenario], args.soak_hours,
+                                        args.soak_interval, args.memory_ceiling)
+
+    print(f"\nTop {len(growth)} allocation sites by growth since the start:")
+    for stat in growth:
+        frame = stat.traceback[0]
+        print(f"{stat.size_diff / 1024:>+10.1f} KiB {stat.count_diff:>+8} blocks  "
+              f"{os.path.basename(frame.filename)}:{frame.lineno}")
+
+    results = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": BENCH_SEED,
+            "scenario": args.soak_scenario,
+            "hours": args.soak_hours,
+            "interval_minutes": args.soak_interval,
+            "memory_ceiling_mb": args.memory_ceiling,
+        },
+        "samples": samples,
+        "top_growth": growth_report(growth),
+        "failure": failure,
+    }
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if failure:
+        print(f"FAILED: {failure}")
+        return 1
+    print("Memory stayed under the ceiling.")
+    return 0
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Coral Reef Aquarium benchmark")
+    parser.add_argument("--ticks", type=int, default=300,
+                        help="measured ticks per scenario (default: 300)")
+    parser.add_argument("--warmup", type=int, default=60,
+                        help="unmeasured ticks before timing starts (default: 60)")
+    parser.add_argument("--only", nargs="+", metavar="NAME",
+                        help="run only these scenarios")
+    parser.add_argument("--list", action="store_true",
+                        help="list scenario names and exit")
+    parser.add_argument("--output", default="benchmark_results.json",
+                        help="where to write the JSON results (default: benchmark_results.json)")
+    parser.add_argument("--baseline", metavar="FILE",
+                        help="compare against an earlier results file")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="relative slowdown that counts as a regression (default: 0.10)")
+    parser.add_argument("--noise-floor", type=float, default=0.05,
+                        help="ignore slowdowns smaller than this many ms (default: 0.05)")
+    parser.add_argument("--soak", action="store_true",
+                        help="run one scenario for many simulated hours and report memory growth")
+    parser.add_argument("--soak-scenario", default="default", metavar="NAME",
+                        help="scenario used by --soak (default: default)")
+    parser.add_argument("--soak-hours", type=float, default=24,
+                        help="simulated hours to soak for (default: 24)")
+    parser.add_argument("--soak-interval", type=float, default=60,
+                        help="simulated minutes between memory samples (default: 60)")
+    parser.add_argument("--memory-ceiling", type=float, default=512,
+                        help="fail the soak once memory passes this many MB (default: 512)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    aquarium = load_aquarium()
+    import pygame
+    pygame.init()
+
+    scenarios = standard_scenarios(aquarium)
+    if args.list:
+        for name in scenarios:
+            print(name)
+        return 0
+
+    if args.soak:
+        status = soak(aquarium, args)
+        pygame.quit()
+        return status
+
+    names = args.only or list(scenarios)
+    unknown = [name for name in names if name not in scenarios]
+    if unknown:
+        print("ERROR: unknown scenario(s): " + ", ".join(unknown))
+        print("Use --list to see the available scenarios.")
+        return 1
+
+    print("=" * 60)
+    print("Coral Reef Aquarium Benchmark")
+    print("=" * 60)
+    print(f"{len(names)} scenario(s), {args.ticks} ticks each (+{args.warmup} warmup)\n")
+    print(f"{'scenario':<22}{'sim p50':>9}{'p95':>8}{'p99':>8}{'max':>8}"
+          f"{'render p50':>12}{'p95':>8}{'p99':>8}{'max':>8}")
+
+    results = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "platform": platform.platform(),
+            "seed": BENCH_SEED,
+            "ticks": args.ticks,
+            "warmup": args.warmup,
+        },
+        "scenarios": {},
+    }
+    for name in names:
+        result = run_scenario(aquarium, pygame, scenarios[name], args.ticks, args.warmup)
+        results["scenarios"][name] = result
+        sim, render = result["sim_ms"], result["render_ms"]
+        print(f"{name:<22}{sim['p50']:>9.3f}{sim['p95']:>8.3f}{sim['p99']:>8.3f}{sim['max']:>8.3f}"
+              f"{render['p50']:>12.3f}{render['p95']:>8.3f}{render['p99']:>8.3f}{render['max']:>8.3f}")
+
+    schooling = {name: result["phase_ms"]["FeederFish.school"]
+                 for name, result in results["scenarios"].items()
+                 if "FeederFish.school" in result["phase_ms"]}
+    if schooling:
+        print("\nSchooling phase (FeederFish.school), mean ms per tick:")
+        for name, ms in schooling.items():
+            print(f"  {name:<28}{ms:>8.3f}")
+
+    results["bytes_per_entity"] = measure_memory(aquarium)
+    print("\nMemory per entity:")
+    for name, size in results["bytes_per_entity"].items():
+        print(f"  {name:<20}{size:>6} bytes")
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {args.output} (times in ms)")
+
+    status = 0
+    if args.baseline:
+        try:
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"ERROR: could not read baseline: {e}")
+            return 1
+        if compare_to_baseline(results, baseline, args.threshold, args.noise_floor):
+            status = 1
+
+    pygame.quit()
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())